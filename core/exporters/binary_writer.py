@@ -0,0 +1,47 @@
+import struct
+from typing import List, Sequence, Union
+from ..importers.binary_reader import INT8, UINT8, UINT16, INT32, FLOAT, VEC3, VEC4
+
+class BinaryWriter:
+    """Collects encoded chunks for a binary file, the writing counterpart of BinaryReader"""
+    def __init__(self, text_encoding: str = 'utf-16-le'):
+        self.chunks: List[bytes] = []
+        self.text_encoding: str = text_encoding
+
+    def write(self, fmt: struct.Struct, *values) -> None:
+        """Encode values with a precompiled struct"""
+        self.chunks.append(fmt.pack(*values))
+
+    def write_int8(self, value: int) -> None:
+        self.write(INT8, value)
+
+    def write_uint8(self, value: int) -> None:
+        self.write(UINT8, value)
+
+    def write_uint16(self, value: int) -> None:
+        self.write(UINT16, value)
+
+    def write_int(self, value: int) -> None:
+        self.write(INT32, value)
+
+    def write_float(self, value: float) -> None:
+        self.write(FLOAT, value)
+
+    def write_vec3(self, value: Sequence[float]) -> None:
+        self.write(VEC3, *value)
+
+    def write_vec4(self, value: Sequence[float]) -> None:
+        self.write(VEC4, *value)
+
+    def write_bytes(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """Append already encoded bytes, such as a whole array section"""
+        self.chunks.append(bytes(data))
+
+    def write_text(self, text: str) -> None:
+        """Write a length-prefixed string in the file's text encoding"""
+        encoded = (text or "").encode(self.text_encoding, errors='replace')
+        self.write_int(len(encoded))
+        self.chunks.append(encoded)
+
+    def getvalue(self) -> bytes:
+        return b''.join(self.chunks)
@@ -0,0 +1,420 @@
+import os
+import bpy
+import time
+import numpy as np
+import numpy.typing as npt
+from typing import Dict, List, Optional, Set, Tuple
+from bpy.types import Operator, Context, Object, Material
+from bpy_extras.io_utils import ExportHelper
+from ..logging_setup import logger
+from ..translations import t
+from ..common import get_active_armature, get_all_meshes
+from ..importers.pmx_decoder import PMXVertexArrays, BDEF1, BDEF2, BDEF4, MORPH_VERTEX
+from ..importers.pmx_reader import PMXBone, PMXMaterial, PMXMorph, PMXModel
+from .pmx_writer import write_pmx
+
+# The importer scales models by 0.08 and turns MMD's Y-up axes into Blender's Z-up axes
+IMPORT_SCALE = 0.08
+BLENDER_TO_PMX_AXES = np.array([[1.0, 0.0, 0.0],
+                                [0.0, 0.0, 1.0],
+                                [0.0, -1.0, 0.0]])
+
+# Shape key offsets shorter than this are left out of the vertex morphs
+MORPH_OFFSET_EPSILON = 1e-6
+
+MAX_ADDITIONAL_UVS = 4
+MAX_BONE_INFLUENCES = 4
+
+def matrix_array(matrix) -> npt.NDArray[np.float64]:
+    return np.array([list(row) for row in matrix], dtype=np.float64)
+
+def points_to_pmx(points: np.ndarray, matrix_world) -> npt.NDArray[np.float32]:
+    """Move object space points to world space, then to MMD axes and scale"""
+    matrix = matrix_array(matrix_world)
+    world = points @ matrix[:3, :3].T + matrix[:3, 3]
+    return (world @ BLENDER_TO_PMX_AXES.T / IMPORT_SCALE).astype(np.float32)
+
+def offsets_to_pmx(offsets: np.ndarray, matrix_world) -> npt.NDArray[np.float32]:
+    """Convert object space offsets, which only take the linear part of the object transform"""
+    matrix = matrix_array(matrix_world)
+    return (offsets @ matrix[:3, :3].T @ BLENDER_TO_PMX_AXES.T / IMPORT_SCALE).astype(np.float32)
+
+def normals_to_pmx(normals: np.ndarray, matrix_world) -> npt.NDArray[np.float32]:
+    """Convert object space normals with the inverse transpose of the object transform"""
+    normal_matrix = np.linalg.inv(matrix_array(matrix_world)[:3, :3]).T
+    world = normals @ normal_matrix.T
+    length = np.linalg.norm(world, axis=1, keepdims=True)
+    world = np.divide(world, length, out=np.zeros_like(world), where=length > 0)
+    return (world @ BLENDER_TO_PMX_AXES.T).astype(np.float32)
+
+def get_array(collection, attribute: str, count: int, width: int, dtype) -> np.ndarray:
+    """Read a bpy collection attribute into a (count, width) array with foreach_get"""
+    values = np.empty(count * width, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    return values.reshape(count, width) if width > 1 else values
+
+def collect_vertex_weights(obj: Object, bone_index_by_name: Dict[str, int]
+                           ) -> Tuple[npt.NDArray[np.int32], npt.NDArray[np.float32]]:
+    """Strongest four bone influences of every vertex, normalized, as (vertices, 4) index and weight arrays"""
+    mesh = obj.data
+    vertex_count = len(mesh.vertices)
+    group_bones = np.full(max(len(obj.vertex_groups), 1), -1, dtype=np.int64)
+    for vertex_group in obj.vertex_groups:
+        group_bones[vertex_group.index] = bone_index_by_name.get(vertex_group.name, -1)
+
+    # Vertex group weights only have a bulk accessor per vertex, each vertex's elements are read
+    # with foreach_get into its slice of flat arrays and the rest is done with arrays
+    counts = np.fromiter((len(vertex.groups) for vertex in mesh.vertices), dtype=np.int64, count=vertex_count)
+    ends = np.cumsum(counts)
+    groups = np.empty(int(ends[-1]) if vertex_count else 0, dtype=np.int32)
+    element_weights = np.empty(len(groups), dtype=np.float32)
+    for vertex, end, count in zip(mesh.vertices, ends.tolist(), counts.tolist()):
+        if count:
+            vertex.groups.foreach_get("group", groups[end - count:end])
+            vertex.groups.foreach_get("weight", element_weights[end - count:end])
+    vertices = np.repeat(np.arange(vertex_count, dtype=np.int64), counts)
+    groups = groups.astype(np.int64)
+    weights = element_weights.astype(np.float64)
+    valid = (groups < len(group_bones)) & (weights > 0)
+    vertices, groups, weights = vertices[valid], groups[valid], weights[valid]
+    bones = group_bones[groups]
+    valid = bones >= 0
+    vertices, bones, weights = vertices[valid], bones[valid], weights[valid]
+
+    order = np.lexsort((-weights, vertices))
+    vertices, bones, weights = vertices[order], bones[order], weights[order]
+    ranks = np.arange(len(vertices)) - np.searchsorted(vertices, vertices)
+    kept = ranks < MAX_BONE_INFLUENCES
+
+    bone_indices = np.full((vertex_count, MAX_BONE_INFLUENCES), -1, dtype=np.int32)
+    bone_weights = np.zeros((vertex_count, MAX_BONE_INFLUENCES), dtype=np.float32)
+    bone_indices[vertices[kept], ranks[kept]] = bones[kept]
+    bone_weights[vertices[kept], ranks[kept]] = weights[kept]
+
+    totals = bone_weights.sum(axis=1, keepdims=True)
+    np.divide(bone_weights, totals, out=bone_weights, where=totals > 0)
+    return bone_indices, bone_weights
+
+def deform_types_for(bone_indices: npt.NDArray[np.int32]) -> npt.NDArray[np.uint8]:
+    """Pick BDEF1, BDEF2 or BDEF4 from the number of influences of each vertex"""
+    influences = (bone_indices >= 0).sum(axis=1)
+    return np.where(influences <= 1, BDEF1, np.where(influences == 2, BDEF2, BDEF4)).astype(np.uint8)
+
+def image_texture_node(material: Material):
+    """Image node feeding the base color, or the first image node of the material"""
+    if not material.use_nodes or material.node_tree is None:
+        return None
+    image_nodes = [node for node in material.node_tree.nodes if node.type == 'TEX_IMAGE' and node.image]
+    for node in image_nodes:
+        if any(link.to_socket.name == "Base Color" for link in node.outputs["Color"].links):
+            return node
+    return image_nodes[0] if image_nodes else None
+
+def texture_path_for(material: Material, export_dir: str) -> Optional[str]:
+    """Path of the material's texture relative to the exported file, with MMD's separators"""
+    node = image_texture_node(material)
+    if node is None:
+        return None
+    path = bpy.path.abspath(node.image.filepath, library=node.image.library)
+    if not path:
+        return None
+    try:
+        path = os.path.relpath(path, export_dir)
+    except ValueError:
+        # Different drive on Windows
+        path = os.path.basename(path)
+    return path.replace(os.sep, '\\')
+
+def convert_material(material: Optional[Material], export_dir: str, textures: List[str],
+                     texture_indices: Dict[str, int]) -> PMXMaterial:
+    """Build a PMX material from the values create_material_nodes sets up"""
+    diffuse = (0.8, 0.8, 0.8, 1.0)
+    specular = (0.0, 0.0, 0.0)
+    specular_strength = 0.5
+    texture_index = -1
+    if material is not None:
+        diffuse = tuple(material.diffuse_color)
+        principled = None
+        if material.use_nodes and material.node_tree is not None:
+            principled = next((node for node in material.node_tree.nodes if node.type == 'BSDF_PRINCIPLED'), None)
+        if principled is not None:
+            base_color = principled.inputs["Base Color"].default_value
+            diffuse = (base_color[0], base_color[1], base_color[2], principled.inputs["Alpha"].default_value)
+            specular = tuple(principled.inputs["Specular Tint"].default_value)[:3]
+            specular_strength = principled.inputs["Specular IOR Level"].default_value
+
+        texture_path = texture_path_for(material, export_dir)
+        if texture_path is not None:
+            if texture_path not in texture_indices:
+                texture_indices[texture_path] = len(textures)
+                textures.append(texture_path)
+            texture_index = texture_indices[texture_path]
+
+    # Ground shadow, self shadow map and self shadow, plus double sided without backface culling
+    flag = 0x0E
+    if material is None or not material.use_backface_culling:
+        flag |= 0x01
+    ambient = tuple(channel * 0.5 for channel in diffuse[:3])
+    name = material.name if material is not None else "Material"
+    return PMXMaterial(name, "", diffuse, specular, specular_strength, ambient, flag,
+                       (0.0, 0.0, 0.0, 1.0), 1.0, texture_index, -1, 0, 1, 0, "", 0)
+
+def collect_bones(armature_obj: Object) -> Tuple[List[PMXBone], Dict[str, int]]:
+    """Convert the armature's bones, including the constraints create_bone_constraints adds"""
+    bones = list(armature_obj.data.bones)
+    bone_index_by_name = {bone.name: i for i, bone in enumerate(bones)}
+    heads = points_to_pmx(np.array([bone.head_local for bone in bones], dtype=np.float64).reshape(-1, 3),
+                          armature_obj.matrix_world)
+    tails = points_to_pmx(np.array([bone.tail_local for bone in bones], dtype=np.float64).reshape(-1, 3),
+                          armature_obj.matrix_world)
+
+    pmx_bones = []
+    for i, bone in enumerate(bones):
+        parent_index = bone_index_by_name[bone.parent.name] if bone.parent else -1
+        pose_bone = armature_obj.pose.bones.get(bone.name)
+        # Operable, plus rotatable, translatable and visible when the bone and its pose allow it
+        flag = 0x0010
+        if pose_bone is None or not all(pose_bone.lock_rotation):
+            flag |= 0x0002
+        if not bone.use_connect and (pose_bone is None or not all(pose_bone.lock_location)):
+            flag |= 0x0004
+        if not bone.hide:
+            flag |= 0x0008
+        inherit_index, inherit_influence = -1, 0.0
+        ik_target_index, ik_loop_count, ik_links = -1, 0, []
+
+        for constraint in (pose_bone.constraints if pose_bone else []):
+            if constraint.target != armature_obj or constraint.subtarget not in bone_index_by_name:
+                continue
+            if constraint.type == 'COPY_ROTATION' and inherit_index < 0:
+                flag |= 0x0100
+                inherit_index = bone_index_by_name[constraint.subtarget]
+                inherit_influence = constraint.influence
+            elif constraint.type == 'IK' and ik_target_index < 0:
+                flag |= 0x0020
+                ik_target_index = bone_index_by_name[constraint.subtarget]
+                ik_loop_count = constraint.iterations
+                ik_links = collect_ik_links(armature_obj, bones[ik_target_index], constraint.chain_count,
+                                            bone_index_by_name)
+
+        pmx_bones.append(PMXBone(bone.name, "", tuple(heads[i].tolist()), parent_index, 0, flag,
+                                 tuple((tails[i] - heads[i]).tolist()), inherit_index, inherit_influence,
+                                 [0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0], 0,
+                                 ik_target_index, ik_loop_count, 1.0, ik_links))
+    return pmx_bones, bone_index_by_name
+
+def collect_ik_links(armature_obj: Object, target_bone, chain_count: int,
+                     bone_index_by_name: Dict[str, int]) -> list:
+    """IK links from the target's parent chain, with the pose bone rotation limits"""
+    links = []
+    bone = target_bone.parent
+    while bone is not None and (chain_count == 0 or len(links) < chain_count):
+        pose_bone = armature_obj.pose.bones[bone.name]
+        if pose_bone.use_ik_limit_x or pose_bone.use_ik_limit_y or pose_bone.use_ik_limit_z:
+            limits = ((pose_bone.ik_min_x, pose_bone.ik_min_y, pose_bone.ik_min_z),
+                      (pose_bone.ik_max_x, pose_bone.ik_max_y, pose_bone.ik_max_z))
+            links.append((bone_index_by_name[bone.name], True, limits))
+        else:
+            links.append((bone_index_by_name[bone.name], False, None))
+        bone = bone.parent
+    return links
+
+class PMXMeshData:
+    """Vertex, face and shape key arrays of one mesh object, split into PMX vertices"""
+    def __init__(self, positions, normals, uvs, additional_uvs, bone_indices, bone_weights,
+                 faces, face_materials, morphs):
+        self.positions = positions
+        self.normals = normals
+        self.uvs = uvs
+        self.additional_uvs = additional_uvs
+        self.bone_indices = bone_indices
+        self.bone_weights = bone_weights
+        self.faces = faces
+        self.face_materials = face_materials
+        self.morphs = morphs
+
+def collect_mesh(obj: Object, bone_index_by_name: Dict[str, int], material_slots: List[int]) -> PMXMeshData:
+    """Pull a mesh object's data with foreach_get and split vertices on their corner normals and UVs"""
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    vertex_count = len(mesh.vertices)
+    loop_count = len(mesh.loops)
+    triangle_count = len(mesh.loop_triangles)
+
+    coordinates = get_array(mesh.vertices, "co", vertex_count, 3, np.float32).astype(np.float64)
+    loop_vertices = get_array(mesh.loops, "vertex_index", loop_count, 1, np.int32)
+    corner_normals = get_array(mesh.corner_normals, "vector", loop_count, 3, np.float32)
+    triangle_loops = get_array(mesh.loop_triangles, "loops", triangle_count, 3, np.int32)
+    triangle_materials = get_array(mesh.loop_triangles, "material_index", triangle_count, 1, np.int32)
+
+    uv_layers = list(mesh.uv_layers)
+    main_layer = next((layer for layer in uv_layers if layer.active_render), uv_layers[0] if uv_layers else None)
+    extra_layers = [layer for layer in uv_layers if layer != main_layer][:MAX_ADDITIONAL_UVS]
+    loop_uvs = [get_array(layer.data, "uv", loop_count, 2, np.float32)
+                for layer in ([main_layer] if main_layer else []) + extra_layers]
+
+    # PMX stores normals and UVs per vertex, so corners that differ become separate vertices
+    corner_keys = np.column_stack([loop_vertices, corner_normals] + loop_uvs).astype(np.float64)
+    _, first_loops, inverse = np.unique(corner_keys, axis=0, return_index=True, return_inverse=True)
+    source_vertices = loop_vertices[first_loops]
+    faces = inverse.ravel()[triangle_loops].astype(np.int32)
+
+    count = len(first_loops)
+    uvs = np.zeros((count, 2), dtype=np.float32)
+    if main_layer is not None:
+        uvs[:] = loop_uvs[0][first_loops]
+        # Back to the top-left origin MMD uses
+        uvs[:, 1] = 1.0 - uvs[:, 1]
+    additional_uvs = np.zeros((count, len(extra_layers), 4), dtype=np.float32)
+    for i, layer_uvs in enumerate(loop_uvs[1:]):
+        additional_uvs[:, i, 0] = layer_uvs[first_loops, 0]
+        additional_uvs[:, i, 1] = 1.0 - layer_uvs[first_loops, 1]
+
+    bone_indices, bone_weights = collect_vertex_weights(obj, bone_index_by_name)
+
+    # Vertex morphs from shape keys, each relative to its own reference key
+    morphs = []
+    if mesh.shape_keys:
+        key_blocks = mesh.shape_keys.key_blocks
+        key_coordinates = {key.name: get_array(key.data, "co", vertex_count, 3, np.float32).astype(np.float64)
+                           for key in key_blocks}
+        reference = mesh.shape_keys.reference_key
+        for key in key_blocks:
+            if key == reference:
+                continue
+            relative = key.relative_key if key.relative_key else reference
+            deltas = offsets_to_pmx(key_coordinates[key.name] - key_coordinates[relative.name],
+                                    obj.matrix_world)[source_vertices]
+            moved = np.flatnonzero(np.abs(deltas).max(axis=1) > MORPH_OFFSET_EPSILON)
+            morphs.append((key.name, moved.astype(np.int32), deltas[moved]))
+
+    slot_lookup = np.asarray(material_slots if material_slots else [0], dtype=np.int32)
+    face_materials = slot_lookup[np.clip(triangle_materials, 0, len(slot_lookup) - 1)]
+
+    return PMXMeshData(points_to_pmx(coordinates[source_vertices], obj.matrix_world),
+                       normals_to_pmx(corner_normals[first_loops].astype(np.float64), obj.matrix_world),
+                       uvs, additional_uvs, bone_indices[source_vertices], bone_weights[source_vertices],
+                       faces, face_materials, morphs)
+
+def collect_pmx_model(armature_obj: Object, mesh_objects: List[Object], export_dir: str) -> PMXModel:
+    """Convert an armature and its meshes into the data model the PMX writer encodes"""
+    bones, bone_index_by_name = collect_bones(armature_obj)
+    # PMX has no deform flag, the importer treats bones without weights as non-deforming
+    deform_bone_index_by_name = {name: index for name, index in bone_index_by_name.items()
+                                 if armature_obj.data.bones[name].use_deform}
+
+    # Materials are shared between meshes by data block
+    blender_materials: List[Optional[Material]] = []
+    material_index: Dict[Optional[str], int] = {}
+    meshes: List[PMXMeshData] = []
+    for obj in mesh_objects:
+        slots = []
+        for slot in obj.material_slots or [None]:
+            material = slot.material if slot is not None else None
+            key = material.name if material is not None else None
+            if key not in material_index:
+                material_index[key] = len(blender_materials)
+                blender_materials.append(material)
+            slots.append(material_index[key])
+        meshes.append(collect_mesh(obj, deform_bone_index_by_name, slots))
+
+    additional_uvs = max((mesh_data.additional_uvs.shape[1] for mesh_data in meshes), default=0)
+    offsets = np.cumsum([0] + [len(mesh_data.positions) for mesh_data in meshes])
+    vertices = PMXVertexArrays(int(offsets[-1]), additional_uvs)
+    for start, mesh_data in zip(offsets.tolist(), meshes):
+        end = start + len(mesh_data.positions)
+        vertices.positions[start:end] = mesh_data.positions
+        vertices.normals[start:end] = mesh_data.normals
+        vertices.uvs[start:end] = mesh_data.uvs
+        vertices.additional_uvs[start:end, :mesh_data.additional_uvs.shape[1]] = mesh_data.additional_uvs
+        vertices.bone_indices[start:end] = mesh_data.bone_indices
+        vertices.bone_weights[start:end] = mesh_data.bone_weights
+    vertices.edge_scales[:] = 1.0
+
+    # Unweighted vertices follow the first bone
+    unweighted = vertices.bone_indices[:, 0] < 0
+    vertices.bone_indices[unweighted, 0] = 0
+    vertices.bone_weights[unweighted, 0] = 1.0
+    vertices.deform_types[:] = deform_types_for(vertices.bone_indices)
+    vertices.bone_indices[vertices.bone_indices < 0] = 0
+
+    # PMX materials own consecutive face ranges, so faces are grouped by material
+    faces = np.concatenate([np.zeros((0, 3), dtype=np.int32)] +
+                           [mesh_data.faces + start for start, mesh_data in zip(offsets.tolist(), meshes)])
+    face_materials = np.concatenate([np.zeros(0, dtype=np.int32)] + [mesh_data.face_materials for mesh_data in meshes])
+    order = np.argsort(face_materials, kind='stable')
+    faces = faces[order]
+    face_counts = np.bincount(face_materials, minlength=len(blender_materials))
+
+    textures: List[str] = []
+    texture_indices: Dict[str, int] = {}
+    materials = []
+    for material, face_count in zip(blender_materials, face_counts.tolist()):
+        if face_count == 0:
+            continue
+        pmx_material = convert_material(material, export_dir, textures, texture_indices)
+        pmx_material.surface_count = face_count
+        materials.append(pmx_material)
+
+    # Shape keys with the same name on several meshes become one morph
+    morph_parts: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+    for start, mesh_data in zip(offsets.tolist(), meshes):
+        for name, indices, morph_offsets in mesh_data.morphs:
+            morph_parts.setdefault(name, []).append((indices + start, morph_offsets))
+    morphs = [PMXMorph(name, "", 4, MORPH_VERTEX,
+                       np.concatenate([indices for indices, _ in parts]).astype(np.int32),
+                       np.concatenate([morph_offsets for _, morph_offsets in parts]).astype(np.float32))
+              for name, parts in morph_parts.items()]
+
+    model_name = armature_obj.name
+    if model_name.endswith("_Armature"):
+        model_name = model_name[:-len("_Armature")]
+    return PMXModel(2.0, additional_uvs, model_name, "", "", "", vertices, faces, textures,
+                    materials, bones, morphs, [], [])
+
+def export_pmx(filepath: str, armature_obj: Object, mesh_objects: List[Object]) -> PMXModel:
+    """Write an armature and its meshes to a PMX file"""
+    start_time = time.perf_counter()
+    model = collect_pmx_model(armature_obj, mesh_objects, os.path.dirname(os.path.abspath(filepath)))
+    collected_time = time.perf_counter()
+    write_pmx(filepath, model)
+    logger.info(f"Exported {len(model.vertices)} vertices, {len(model.faces)} faces and {len(model.morphs)} morphs "
+                f"to {filepath} (collect {collected_time - start_time:.2f}s, "
+                f"write {time.perf_counter() - collected_time:.2f}s)")
+    return model
+
+class AvatarToolkit_OT_ExportPMX(Operator, ExportHelper):
+    """Export the active armature and its meshes as a PMX model"""
+    bl_idname = "avatar_toolkit.export_pmx"
+    bl_label = t("QuickAccess.export_pmx")
+    bl_description = t("QuickAccess.export_pmx_desc")
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".pmx"
+    filter_glob: bpy.props.StringProperty(
+        default="*.pmx",
+        options={'HIDDEN'}
+    )
+
+    @classmethod
+    def poll(cls, context: Context) -> bool:
+        return get_active_armature(context) is not None
+
+    def execute(self, context: Context) -> Set[str]:
+        armature = get_active_armature(context)
+        meshes = get_all_meshes(context)
+        if not meshes:
+            self.report({'WARNING'}, t("QuickAccess.export_pmx_no_meshes"))
+            return {'CANCELLED'}
+
+        try:
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            export_pmx(self.filepath, armature, meshes)
+        except Exception as e:
+            logger.error(f"PMX export failed: {str(e)}", exc_info=True)
+            self.report({'ERROR'}, t("QuickAccess.export_pmx_failed", error=str(e)))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, t("QuickAccess.export_pmx_success", filepath=self.filepath))
+        return {'FINISHED'}
@@ -0,0 +1,84 @@
+import numpy as np
+import numpy.typing as npt
+from ..importers.pmx_decoder import (
+    PMXVertexArrays, vertex_record_dtype, morph_offset_dtype, index_dtype,
+    BDEF1, BDEF2, BDEF4, QDEF, DEFORM_BONE_COUNTS, MORPH_OPERATION_TYPES
+)
+
+# Array encoders mirroring pmx_decoder, every section is written with one tobytes() per record layout
+
+# Records are scattered in chunks to keep the temporary byte index arrays small
+SCATTER_CHUNK_SIZE = 16384
+
+# Deform type written for each decoded type, SDEF and QDEF parameters are not kept by the importer
+WRITTEN_DEFORM_TYPES = np.array([BDEF1, BDEF2, BDEF4, BDEF2, BDEF4], dtype=np.uint8)
+
+def index_size_for(count: int, unsigned_small: bool = False) -> int:
+    """Smallest PMX index size able to address count items, signed indices also need room for -1"""
+    limits = (255, 65535) if unsigned_small else (127, 32767)
+    if count <= limits[0]:
+        return 1
+    if count <= limits[1]:
+        return 2
+    return 4
+
+def scatter_records(output: npt.NDArray[np.uint8], starts: npt.NDArray[np.int64], records: np.ndarray) -> None:
+    """Copy fixed-size records to arbitrary byte offsets of the output, the inverse of gather_records"""
+    itemsize = records.dtype.itemsize
+    record_bytes = records.view(np.uint8).reshape(len(records), itemsize)
+    byte_range = np.arange(itemsize, dtype=np.int64)
+    for chunk in range(0, len(starts), SCATTER_CHUNK_SIZE):
+        chunk_starts = starts[chunk:chunk + SCATTER_CHUNK_SIZE]
+        output[chunk_starts[:, None] + byte_range] = record_bytes[chunk:chunk + len(chunk_starts)]
+
+def encode_vertices(vertices: PMXVertexArrays, additional_uvs: int, bone_index_size: int) -> bytes:
+    """Encode the whole PMX vertex section body, records of different deform types in vertex order"""
+    count = len(vertices)
+    types = WRITTEN_DEFORM_TYPES[np.minimum(vertices.deform_types, QDEF)]
+    dtypes = {deform_type: vertex_record_dtype(deform_type, additional_uvs, bone_index_size)
+              for deform_type in np.unique(types).tolist()}
+
+    encoded = {}
+    for deform_type, dtype in dtypes.items():
+        selection = np.flatnonzero(types == deform_type)
+        records = np.zeros(len(selection), dtype=dtype)
+        records['position'] = vertices.positions[selection]
+        records['normal'] = vertices.normals[selection]
+        records['uv'] = vertices.uvs[selection]
+        if additional_uvs:
+            records['additional_uvs'] = vertices.additional_uvs[selection, :additional_uvs]
+        records['deform_type'] = deform_type
+        records['bone_indices'] = vertices.bone_indices[selection, :DEFORM_BONE_COUNTS[deform_type]]
+        if deform_type == BDEF2:
+            records['weight'] = vertices.bone_weights[selection, 0]
+        elif deform_type == BDEF4:
+            records['weights'] = vertices.bone_weights[selection]
+        records['edge_scale'] = vertices.edge_scales[selection]
+        encoded[deform_type] = (selection, records)
+
+    # Most meshes use a single deform type and need no interleaving
+    if len(encoded) == 1:
+        return next(iter(encoded.values()))[1].tobytes()
+
+    sizes = np.zeros(count, dtype=np.int64)
+    for deform_type, (selection, _) in encoded.items():
+        sizes[selection] = dtypes[deform_type].itemsize
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    output = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for selection, records in encoded.values():
+        scatter_records(output, starts[selection], records)
+    return output.tobytes()
+
+def encode_faces(faces: npt.NDArray[np.int32], vertex_index_size: int) -> bytes:
+    """Encode a (faces, 3) index array as the PMX face section body"""
+    return np.ascontiguousarray(faces).astype(index_dtype(vertex_index_size, unsigned_small=True)).tobytes()
+
+def encode_morph_offsets(morph_type: int, indices: npt.NDArray[np.int32], offsets: npt.NDArray[np.float32],
+                         operations: npt.NDArray[np.uint8], index_size: int) -> bytes:
+    """Encode the offset records of a morph from its index, value and operation columns"""
+    records = np.zeros(len(indices), dtype=morph_offset_dtype(morph_type, index_size))
+    records['index'] = indices
+    records['offset'] = np.asarray(offsets, dtype=np.float32).reshape(len(indices), -1)
+    if morph_type in MORPH_OPERATION_TYPES and len(operations):
+        records['operation'] = operations
+    return records.tobytes()
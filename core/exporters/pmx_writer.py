@@ -0,0 +1,222 @@
+import os
+from typing import List, Tuple
+from .binary_writer import BinaryWriter
+from .pmx_encoder import index_size_for, encode_vertices, encode_faces, encode_morph_offsets
+from ..importers.pmx_decoder import MORPH_TARGET_SECTIONS
+from ..importers.pmx_reader import (
+    PMXBone, PMXMaterial, PMXMorph, PMXRigidBody, PMXJoint, PMXModel, PMXIndexStructs,
+    HEADER_GLOBALS, RIGID_BODY_PARAMETERS
+)
+
+# Writes the data model the PMX importer reads, plain Python and NumPy like the reader
+
+PMX_VERSION = 2.0
+
+# Display frame element types
+FRAME_BONE = 0
+FRAME_MORPH = 1
+
+def model_index_sizes(model: PMXModel) -> Tuple[int, int, int, int, int, int]:
+    """Smallest vertex, texture, material, bone, morph and rigid body index sizes for a model"""
+    return (index_size_for(len(model.vertices), unsigned_small=True),
+            index_size_for(len(model.textures)),
+            index_size_for(len(model.materials)),
+            index_size_for(len(model.bones)),
+            index_size_for(len(model.morphs)),
+            index_size_for(len(model.rigid_bodies)))
+
+def write_pmx_header(writer: BinaryWriter, model: PMXModel, index_sizes: Tuple[int, ...]) -> None:
+    writer.write_bytes(b'PMX ')
+    writer.write_float(max(float(model.version), PMX_VERSION))
+    writer.write_int8(8)
+    # UTF-16 text, the importer's default encoding
+    writer.write(HEADER_GLOBALS, 0, model.additional_uvs, *index_sizes)
+    writer.write_text(model.name)
+    writer.write_text(model.english_name)
+    writer.write_text(model.comment)
+    writer.write_text(model.english_comment)
+
+def write_material(writer: BinaryWriter, material: PMXMaterial, indices: PMXIndexStructs) -> None:
+    writer.write_text(material.name)
+    writer.write_text(material.english_name)
+
+    writer.write_vec4(material.diffuse)
+    writer.write_vec3(material.specular)
+    writer.write_float(material.specular_strength)
+    writer.write_vec3(material.ambient)
+
+    writer.write_int8(material.flag)
+    writer.write_vec4(material.edge_color)
+    writer.write_float(material.edge_size)
+
+    writer.write(indices.texture, material.texture_index)
+    writer.write(indices.texture, material.sphere_texture_index)
+    writer.write_int8(material.sphere_mode)
+    writer.write_int8(material.toon_sharing_flag)
+
+    if material.toon_sharing_flag == 0:
+        writer.write(indices.texture, material.toon_texture_index)
+    else:
+        writer.write_int8(material.toon_texture_index)
+
+    writer.write_text(material.comment)
+    # The reader stores faces, the file stores face vertex indices
+    writer.write_int(material.surface_count * 3)
+
+def write_bone(writer: BinaryWriter, bone: PMXBone, indices: PMXIndexStructs) -> None:
+    writer.write_text(bone.name)
+    writer.write_text(bone.english_name)
+
+    bone_index = indices.bone
+    writer.write_vec3(bone.position)
+    writer.write(bone_index, bone.parent_index)
+    writer.write_int(bone.layer)
+    writer.write_uint16(bone.flag)
+
+    if not (bone.flag & 0x0001):
+        writer.write_vec3(bone.tail_position)
+    else:
+        writer.write(bone_index, bone.tail_index)
+
+    if bone.flag & 0x0100 or bone.flag & 0x0200:
+        writer.write(bone_index, bone.inherit_parent_index)
+        writer.write_float(bone.inherit_influence)
+
+    if bone.flag & 0x0400:
+        writer.write_vec3(bone.fixed_axis)
+
+    if bone.flag & 0x0800:
+        writer.write_vec3(bone.local_x)
+        writer.write_vec3(bone.local_z)
+
+    if bone.flag & 0x2000:
+        writer.write_int(bone.external_key)
+
+    if bone.flag & 0x0020:
+        writer.write(bone_index, bone.ik_target_index)
+        writer.write_int(bone.ik_loop_count)
+        writer.write_float(bone.ik_limit_rad)
+        writer.write_int(len(bone.ik_links))
+
+        for link_bone_index, has_limits, angle_limits in bone.ik_links:
+            writer.write(bone_index, link_bone_index)
+            writer.write_int8(1 if has_limits else 0)
+            if has_limits:
+                writer.write_vec3(angle_limits[0])
+                writer.write_vec3(angle_limits[1])
+
+def write_morph(writer: BinaryWriter, morph: PMXMorph, indices: PMXIndexStructs) -> None:
+    writer.write_text(morph.name)
+    writer.write_text(morph.english_name)
+    writer.write_int8(morph.panel)
+    writer.write_int8(morph.morph_type)
+    writer.write_int(len(morph.indices))
+    index_size = getattr(indices, MORPH_TARGET_SECTIONS.get(morph.morph_type, 'vertex')).size
+    writer.write_bytes(encode_morph_offsets(morph.morph_type, morph.indices, morph.offsets,
+                                            morph.operations, index_size))
+
+def write_display_frame(writer: BinaryWriter, name: str, english_name: str, special_flag: int,
+                        elements: List[Tuple[int, int]], indices: PMXIndexStructs) -> None:
+    writer.write_text(name)
+    writer.write_text(english_name)
+    writer.write_int8(special_flag)
+    writer.write_int(len(elements))
+    for element_type, index in elements:
+        writer.write_int8(element_type)
+        writer.write(indices.bone if element_type == FRAME_BONE else indices.morph, index)
+
+def write_display_frames(writer: BinaryWriter, model: PMXModel, indices: PMXIndexStructs) -> None:
+    """Write the two special frames MMD expects, the root bone and the facial morphs"""
+    writer.write_int(2)
+    root = [(FRAME_BONE, 0)] if model.bones else []
+    write_display_frame(writer, "Root", "Root", 1, root, indices)
+    morphs = [(FRAME_MORPH, i) for i in range(len(model.morphs))]
+    write_display_frame(writer, "表情", "Exp", 1, morphs, indices)
+
+def write_rigid_body(writer: BinaryWriter, rigid_body: PMXRigidBody, indices: PMXIndexStructs) -> None:
+    writer.write_text(rigid_body.name)
+    # English names are not kept by the reader
+    writer.write_text("")
+
+    writer.write(indices.bone, rigid_body.bone_index)
+    writer.write_uint8(rigid_body.group)
+    # Collide with every group, the reader does not keep the mask
+    writer.write_uint16(0xFFFF)
+    writer.write_uint8(rigid_body.shape_type)
+    writer.write_vec3(rigid_body.size)
+    writer.write_vec3(rigid_body.position)
+    writer.write_vec3(rigid_body.rotation)
+    writer.write(RIGID_BODY_PARAMETERS, rigid_body.mass, rigid_body.linear_damping, rigid_body.angular_damping,
+                 rigid_body.restitution, rigid_body.friction)
+    writer.write_uint8(rigid_body.mode)
+
+def write_joint(writer: BinaryWriter, joint: PMXJoint, indices: PMXIndexStructs) -> None:
+    writer.write_text(joint.name)
+    writer.write_text("")
+
+    writer.write_uint8(joint.joint_type)
+    writer.write(indices.rigid_body, joint.rigid_body_a)
+    writer.write(indices.rigid_body, joint.rigid_body_b)
+    writer.write_vec3(joint.position)
+    writer.write_vec3(joint.rotation)
+    writer.write_vec3(joint.linear_limit_min)
+    writer.write_vec3(joint.linear_limit_max)
+    writer.write_vec3(joint.angular_limit_min)
+    writer.write_vec3(joint.angular_limit_max)
+    writer.write_vec3(joint.spring_constant_translation)
+    writer.write_vec3(joint.spring_constant_rotation)
+
+def encode_pmx(model: PMXModel) -> bytes:
+    """Encode a model in the layout read_pmx expects"""
+    writer = BinaryWriter()
+    index_sizes = model_index_sizes(model)
+    write_pmx_header(writer, model, index_sizes)
+    indices = PMXIndexStructs(*index_sizes)
+    vertex_index_size, _, _, bone_index_size, _, _ = index_sizes
+
+    # Geometry sections are encoded as whole arrays
+    writer.write_int(len(model.vertices))
+    writer.write_bytes(encode_vertices(model.vertices, model.additional_uvs, bone_index_size))
+    writer.write_int(len(model.faces) * 3)
+    writer.write_bytes(encode_faces(model.faces, vertex_index_size))
+
+    writer.write_int(len(model.textures))
+    for texture in model.textures:
+        writer.write_text(texture)
+
+    writer.write_int(len(model.materials))
+    for material in model.materials:
+        write_material(writer, material, indices)
+
+    writer.write_int(len(model.bones))
+    for bone in model.bones:
+        write_bone(writer, bone, indices)
+
+    writer.write_int(len(model.morphs))
+    for morph in model.morphs:
+        write_morph(writer, morph, indices)
+
+    write_display_frames(writer, model, indices)
+
+    writer.write_int(len(model.rigid_bodies))
+    for rigid_body in model.rigid_bodies:
+        write_rigid_body(writer, rigid_body, indices)
+
+    writer.write_int(len(model.joints))
+    for joint in model.joints:
+        write_joint(writer, joint, indices)
+
+    return writer.getvalue()
+
+def write_pmx(filepath: str, model: PMXModel) -> None:
+    """Write a model to a PMX file, replacing the file only once it is fully written"""
+    data = encode_pmx(model)
+    temp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, filepath)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,136 @@
+import mmap
+import struct
+from typing import Any, Optional, Tuple, Union
+
+# Precompiled little-endian structs shared by the binary importers
+INT8 = struct.Struct('<b')
+UINT8 = struct.Struct('<B')
+INT16 = struct.Struct('<h')
+UINT16 = struct.Struct('<H')
+INT32 = struct.Struct('<i')
+UINT32 = struct.Struct('<I')
+FLOAT = struct.Struct('<f')
+VEC2 = struct.Struct('<2f')
+VEC3 = struct.Struct('<3f')
+VEC4 = struct.Struct('<4f')
+
+class BinaryReader:
+    """Offset cursor over a memory-mapped file that decodes values in place with unpack_from"""
+    def __init__(self, source: Union[bytes, bytearray, mmap.mmap], offset: int = 0):
+        self.source = source
+        self.buffer: memoryview = memoryview(source)
+        self.offset: int = offset
+        self.text_encoding: str = 'utf-16-le'
+        self._file: Optional[Any] = None
+
+    @classmethod
+    def open(cls, filepath: str) -> 'BinaryReader':
+        """Map a file read-only and return a reader positioned at its start"""
+        file = open(filepath, 'rb')
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            file.close()
+            raise ValueError(f"File is empty: {filepath}")
+        except Exception:
+            file.close()
+            raise
+        reader = cls(mapped)
+        reader._file = file
+        return reader
+
+    def close(self) -> None:
+        """Release the buffer and unmap the file"""
+        try:
+            self.buffer.release()
+            if isinstance(self.source, mmap.mmap):
+                self.source.close()
+        except BufferError:
+            # Arrays still reference the mapping, it is unmapped once they are freed
+            pass
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'BinaryReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def remaining(self) -> int:
+        """Number of bytes left after the cursor"""
+        return len(self.buffer) - self.offset
+
+    def skip(self, size: int) -> None:
+        """Advance the cursor without decoding"""
+        if self.offset + size > len(self.buffer):
+            raise struct.error(f"Cannot skip {size} bytes at offset {self.offset}")
+        self.offset += size
+
+    def read(self, fmt: struct.Struct) -> Tuple:
+        """Decode a precompiled struct at the cursor"""
+        values = fmt.unpack_from(self.buffer, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def unpack(self, fmt: str) -> Tuple:
+        """Decode a format string at the cursor"""
+        values = struct.unpack_from(fmt, self.buffer, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def read_int8(self) -> int:
+        return self.read(INT8)[0]
+
+    def read_uint8(self) -> int:
+        return self.read(UINT8)[0]
+
+    def read_int16(self) -> int:
+        return self.read(INT16)[0]
+
+    def read_uint16(self) -> int:
+        return self.read(UINT16)[0]
+
+    def read_int(self) -> int:
+        return self.read(INT32)[0]
+
+    def read_uint(self) -> int:
+        return self.read(UINT32)[0]
+
+    def read_float(self) -> float:
+        return self.read(FLOAT)[0]
+
+    def read_vec2(self) -> Tuple[float, float]:
+        return self.read(VEC2)
+
+    def read_vec3(self) -> Tuple[float, float, float]:
+        return self.read(VEC3)
+
+    def read_vec4(self) -> Tuple[float, float, float, float]:
+        return self.read(VEC4)
+
+    def read_bytes(self, size: int) -> memoryview:
+        """Return a view of the next bytes without copying them"""
+        if self.offset + size > len(self.buffer):
+            raise struct.error(f"Cannot read {size} bytes at offset {self.offset}")
+        view = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return view
+
+    def read_text(self) -> str:
+        """Read a length-prefixed string in the file's text encoding"""
+        size = self.read_int()
+        return str(self.read_bytes(size), self.text_encoding, errors='replace')
+
+    def read_fixed_text(self, size: int, encoding: str = 'shift-jis') -> str:
+        """Read a null-terminated string stored in a fixed-size field"""
+        start = self.offset
+        self.skip(size)
+        end = self.source.find(b'\0', start, start + size)
+        if end < 0:
+            end = start + size
+        return str(self.buffer[start:end], encoding, errors='replace')
@@ -0,0 +1,59 @@
+import bpy
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+# Data collections that can receive new blocks during a PMX or PMD build
+ROLLBACK_COLLECTIONS = ("objects", "meshes", "armatures", "materials", "images", "collections")
+
+def data_block_ids(name: str) -> Set[int]:
+    """Session ids of the blocks in one bpy.data collection, unlike pointers they are never reused"""
+    return {block.session_uid for block in getattr(bpy.data, name)}
+
+def rigid_body_world_scenes() -> Set[int]:
+    """Session ids of the scenes that have a rigid body world"""
+    return {scene.session_uid for scene in bpy.data.scenes if scene.rigidbody_world}
+
+class BuildRollback:
+    """
+    Records the data blocks and rigid body worlds created by build code run inside track(),
+    so a failed or cancelled build removes what it made and nothing else
+    """
+    def __init__(self):
+        self.created: Dict[str, Set[int]] = {name: set() for name in ROLLBACK_COLLECTIONS}
+        self.world_scenes: Set[int] = set()
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """
+        Record the blocks created by the enclosed code. It has to run without handing control
+        back to Blender, so that nothing the user does in the meantime is recorded
+        """
+        existing = {name: data_block_ids(name) for name in ROLLBACK_COLLECTIONS}
+        had_world = rigid_body_world_scenes()
+        try:
+            yield
+        finally:
+            for name in ROLLBACK_COLLECTIONS:
+                self.created[name] |= data_block_ids(name) - existing[name]
+            self.world_scenes |= rigid_body_world_scenes() - had_world
+
+    @property
+    def images(self) -> Set[int]:
+        """Session ids of the images loaded by the build"""
+        return self.created["images"]
+
+    def remove(self) -> int:
+        """Remove the recorded blocks and rigid body worlds that still exist"""
+        for scene in bpy.data.scenes:
+            if scene.rigidbody_world and scene.session_uid in self.world_scenes:
+                with bpy.context.temp_override(scene=scene):
+                    bpy.ops.rigidbody.world_remove()
+
+        # The world's collections and the rigid body objects are recorded like any other block
+        blocks = [block for name in ROLLBACK_COLLECTIONS for block in getattr(bpy.data, name)
+                  if block.session_uid in self.created[name]]
+        if blocks:
+            bpy.data.batch_remove(blocks)
+        self.created = {name: set() for name in ROLLBACK_COLLECTIONS}
+        self.world_scenes = set()
+        return len(blocks)
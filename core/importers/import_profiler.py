@@ -0,0 +1,195 @@
+import os
+import bpy
+import json
+import time
+import logging
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from ..logging_setup import logger
+from ..addon_preferences import get_preference
+
+# Stages outside any file, such as the batch parse of several files, are recorded under this name
+BATCH_FILE = "(batch)"
+
+class StageTiming:
+    """Accumulated cost of one import stage of one file"""
+    __slots__ = ('filepath', 'stage', 'calls', 'wall', 'cpu', 'peak_bytes')
+
+    def __init__(self, filepath: str, stage: str):
+        self.filepath: str = filepath
+        self.stage: str = stage
+        self.calls: int = 0
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+        self.peak_bytes: int = 0
+
+class StageFrame:
+    """A stage that is currently running, with the allocation peak seen while it ran"""
+    __slots__ = ('start_bytes', 'peak_bytes')
+
+    def __init__(self, start_bytes: int):
+        self.start_bytes: int = start_bytes
+        self.peak_bytes: int = start_bytes
+
+class ImportProfiler:
+    """Records wall time, CPU time and peak Python allocation of import stages per file"""
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory: bool = trace_memory
+        self.timings: Dict[Tuple[str, str], StageTiming] = {}
+        self.current_file: str = BATCH_FILE
+        self.frames: List[StageFrame] = []
+        self.started_tracing: bool = False
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stop(self) -> None:
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def traced_memory(self) -> Tuple[int, int]:
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+    @contextmanager
+    def stage(self, name: str, filepath: Optional[str] = None) -> Iterator[None]:
+        """Time a block as a stage of the current file, or of filepath, which becomes current inside it"""
+        outer_file = self.current_file
+        if filepath is not None:
+            self.current_file = filepath
+        timing = self.timings.get((self.current_file, name))
+        if timing is None:
+            timing = self.timings[(self.current_file, name)] = StageTiming(self.current_file, name)
+
+        # The tracemalloc peak is shared, so the enclosing stage keeps the peak seen so far
+        # before it is reset for this one
+        current, peak = self.traced_memory()
+        if self.frames:
+            self.frames[-1].peak_bytes = max(self.frames[-1].peak_bytes, peak)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        frame = StageFrame(current)
+        self.frames.append(frame)
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            timing.calls += 1
+            timing.wall += time.perf_counter() - start_wall
+            timing.cpu += time.process_time() - start_cpu
+            peak = max(frame.peak_bytes, self.traced_memory()[1])
+            timing.peak_bytes = max(timing.peak_bytes, peak - frame.start_bytes)
+            self.frames.pop()
+            if self.frames:
+                self.frames[-1].peak_bytes = max(self.frames[-1].peak_bytes, peak)
+            self.current_file = outer_file
+
+    def report(self) -> Dict[str, Any]:
+        """Stage timings grouped by file, in the order they were first recorded"""
+        files: Dict[str, List[Dict[str, Any]]] = {}
+        for timing in self.timings.values():
+            files.setdefault(timing.filepath, []).append({
+                "stage": timing.stage,
+                "calls": timing.calls,
+                "wall_seconds": round(timing.wall, 6),
+                "cpu_seconds": round(timing.cpu, 6),
+                "peak_bytes": timing.peak_bytes,
+            })
+        return {
+            "memory_traced": self.trace_memory,
+            "files": [{"file": filepath, "stages": stages} for filepath, stages in files.items()],
+        }
+
+    def summary_table(self) -> str:
+        """Plain text table of every stage of every file"""
+        lines = [f"{'File':<32} {'Stage':<16} {'Calls':>5} {'Wall s':>9} {'CPU s':>9} {'Peak MiB':>9}"]
+        for timing in self.timings.values():
+            name = os.path.basename(timing.filepath) or timing.filepath
+            lines.append(f"{name[:32]:<32} {timing.stage[:16]:<16} {timing.calls:>5} {timing.wall:>9.3f} "
+                         f"{timing.cpu:>9.3f} {timing.peak_bytes / (1024 * 1024):>9.2f}")
+        return "\n".join(lines)
+
+    def write_report(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=4, ensure_ascii=False)
+
+# Profiler of the import running right now, None when profiling is off
+active_profiler: Optional[ImportProfiler] = None
+
+# The report is asked for with the profiling preference, so it has its own console handler
+# instead of depending on the add-on logger's level
+profile_logger = logger.getChild('import_profiler')
+
+def configure_profile_logger() -> None:
+    """Show the profiler's INFO records on the console, once"""
+    if profile_logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    profile_logger.addHandler(handler)
+    profile_logger.setLevel(logging.INFO)
+    profile_logger.propagate = False
+
+def report_directory() -> Optional[str]:
+    """Directory for JSON reports in the extension's user directory, None when not installed as an extension"""
+    addon_package = __package__.rsplit('.', 2)[0]
+    try:
+        return bpy.utils.extension_path_user(addon_package, path="import_profiles", create=True)
+    except ValueError:
+        return None
+
+@contextmanager
+def profile_imports() -> Iterator[Optional[ImportProfiler]]:
+    """
+    Profile the imports inside the block when enabled in the preferences. Nested blocks share
+    the outer profiler, which logs the summary and writes the JSON report when it finishes
+    """
+    global active_profiler
+    if active_profiler is not None or not get_preference("enable_import_profiling", False):
+        yield active_profiler
+        return
+
+    configure_profile_logger()
+    profiler = ImportProfiler(get_preference("import_profiling_trace_memory", False))
+    active_profiler = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        active_profiler = None
+        profile_logger.info(f"Import stage timings:\n{profiler.summary_table()}")
+        if get_preference("import_profiling_json_report", False):
+            directory = report_directory()
+            if directory is not None:
+                path = os.path.join(directory, time.strftime("import_%Y%m%d_%H%M%S.json"))
+                try:
+                    profiler.write_report(path)
+                    profile_logger.info(f"Import profile written to {path}")
+                except OSError as e:
+                    profile_logger.warning(f"Could not write import profile {path}: {str(e)}")
+
+@contextmanager
+def import_stage(name: str, filepath: Optional[str] = None) -> Iterator[None]:
+    """Time a block as an import stage, costs nothing when no import is being profiled"""
+    if active_profiler is None:
+        yield
+        return
+    with active_profiler.stage(name, filepath):
+        yield
+
+def profiled_stage(name: str) -> Callable:
+    """Decorator form of import_stage"""
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with import_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
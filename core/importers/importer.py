@@ -2,10 +2,17 @@ import bpy
 import logging
 import os
 import typing
-from typing import Optional, Callable, Dict, List, Union, Set
+from typing import Optional, Callable, Dict, List, Tuple, Union, Set
 from ..common import clear_default_objects
-from .import_pmx import import_pmx
-from .import_pmd import import_pmd
+from .import_pmx import build_pmx
+from .import_pmd import build_pmd
+from .pmx_reader import pack_pmx_model, unpack_pmx_model
+from .pmd_reader import pack_pmd_model, unpack_pmd_model
+from .parallel_parse import ParseResult, model_format, parse_files
+from .parse_cache import get_parse_cache
+from .texture_cache import TextureCache
+from .build_rollback import BuildRollback
+from .import_profiler import profile_imports, import_stage
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -64,27 +71,124 @@ def import_multi_files(
         if not files:
             if not validate_file(filepath):
                 return
-            method(directory, filepath)
+            with profile_imports(), import_stage("import", filepath):
+                method(directory, filepath)
             if progress_callback:
                 progress_callback(filepath)
         else:
             progress = ImportProgress(len(files))
-            for file in files:
-                fullpath: str = os.path.join(directory, os.path.basename(file["name"]))
-                if not validate_file(fullpath):
-                    continue
-                    
-                logger.info(f"Importing file: {fullpath}")
-                method(directory, fullpath)
-                
-                if progress_callback:
-                    progress_callback(fullpath)
-                progress.update(file["name"])
-                
+            with profile_imports():
+                for file in files:
+                    fullpath: str = os.path.join(directory, os.path.basename(file["name"]))
+                    if not validate_file(fullpath):
+                        continue
+
+                    logger.info(f"Importing file: {fullpath}")
+                    with import_stage("import", fullpath):
+                        method(directory, fullpath)
+
+                    if progress_callback:
+                        progress_callback(fullpath)
+                    progress.update(file["name"])
+
     except Exception as e:
         logger.error(f"Import failed: {str(e)}", exc_info=True)
         raise
 
+# Share of the progress bar used by parsing, the builds share the rest
+MMD_PARSE_PROGRESS_SHARE = 0.2
+
+# Build stage and parse cache (de)serializers for each MMD format
+MMD_FORMATS: Dict[str, Tuple[Callable, Callable, Callable]] = {
+    "pmx": (build_pmx, pack_pmx_model, unpack_pmx_model),
+    "pmd": (build_pmd, pack_pmd_model, unpack_pmd_model),
+}
+
+def load_mmd_models(filepaths: List[str]) -> List[ParseResult]:
+    """Parse MMD files, taking unchanged ones from the parse cache and spreading the rest over worker processes"""
+    parse_cache = get_parse_cache()
+    results: Dict[str, ParseResult] = {}
+    keys: Dict[str, str] = {}
+    pending: List[str] = []
+
+    for filepath in filepaths:
+        if parse_cache is not None and model_format(filepath) in MMD_FORMATS:
+            _, _, unpack = MMD_FORMATS[model_format(filepath)]
+            keys[filepath] = parse_cache.key(filepath, model_format(filepath))
+            with import_stage("parse_cache", filepath):
+                cached = parse_cache.load(keys[filepath])
+            if cached is not None:
+                results[filepath] = (filepath, unpack(*cached), None)
+                continue
+        pending.append(filepath)
+
+    # Worker processes parse the files side by side, so the parse is timed as one batch
+    with import_stage("parse"):
+        parsed = parse_files(pending)
+    for filepath, model, error in parsed:
+        results[filepath] = (filepath, model, error)
+        if model is not None and filepath in keys:
+            _, pack, _ = MMD_FORMATS[model_format(filepath)]
+            with import_stage("parse_cache", filepath):
+                parse_cache.store(keys[filepath], *pack(model))
+
+    return [results[filepath] for filepath in filepaths]
+
+def import_mmd_files(directory: str, files: List[Dict[str, str]], filepath: str) -> None:
+    """
+    Import PMX/PMD models: parse all selected files in parallel, then build them
+    one after another on the main thread with one shared texture cache.
+    A failed build is rolled back, failures are raised together once every file was tried
+    """
+    if files:
+        filepaths = [os.path.join(directory, os.path.basename(file["name"])) for file in files]
+    else:
+        filepaths = [filepath]
+    filepaths = [path for path in filepaths if validate_file(path)]
+
+    texture_cache = TextureCache()
+    progress = ImportProgress(len(filepaths))
+    failures: List[str] = []
+    wm = bpy.context.window_manager
+    wm.progress_begin(0, 100)
+    try:
+        with profile_imports():
+            results = load_mmd_models(filepaths)
+            wm.progress_update(int(MMD_PARSE_PROGRESS_SHARE * 100))
+
+            build_share = (1.0 - MMD_PARSE_PROGRESS_SHARE) / max(len(results), 1)
+            for i, (path, model, error) in enumerate(results):
+                if error is not None:
+                    logger.error(f"Failed to read {path}: {error}")
+                    failures.append(f"{os.path.basename(path)}: {error}")
+                    continue
+                build, _, _ = MMD_FORMATS[model_format(path)]
+                start = MMD_PARSE_PROGRESS_SHARE + i * build_share
+
+                def update_build_progress(fraction: float, start: float = start) -> None:
+                    wm.progress_update(int((start + build_share * fraction) * 100))
+
+                rollback = BuildRollback()
+                try:
+                    with import_stage("build", path), rollback.track():
+                        build(model, path, texture_cache, update_build_progress)
+                except Exception as e:
+                    logger.error(f"Import failed for {path}: {str(e)}", exc_info=True)
+                    failures.append(f"{os.path.basename(path)}: {str(e)}")
+                    if bpy.context.mode != 'OBJECT':
+                        bpy.ops.object.mode_set(mode='OBJECT')
+                    texture_cache.discard(rollback.images)
+                    removed = rollback.remove()
+                    logger.info(f"Rolled back import of {path}, removed {removed} data blocks")
+                    continue
+                logger.info(f"Imported {model.name} from {path}")
+                progress.update(os.path.basename(path))
+    finally:
+        wm.progress_end()
+
+    if failures:
+        raise RuntimeError(f"Failed to import {len(failures)} of {len(filepaths)} files: " + "; ".join(failures))
+
 ImportMethod = Callable[[str, List[Dict[str, str]], str], None]
 
 import_types: Dict[str, ImportMethod] = {
@@ -118,8 +222,8 @@ import_types: Dict[str, ImportMethod] = {
         method=lambda directory, filepath: bpy.ops.tuxedo.import_mmd_animation(directory=directory, filepath=filepath)
     ),
     "vrm": lambda directory, files, filepath: bpy.ops.import_scene.vrm(filepath=filepath),
-    "pmx": lambda directory, files, filepath: import_pmx(filepath),
-    "pmd": lambda directory, files, filepath: import_pmd(filepath),
+    "pmx": lambda directory, files, filepath: import_mmd_files(directory, files, filepath),
+    "pmd": lambda directory, files, filepath: import_mmd_files(directory, files, filepath),
     "animx": (lambda directory, files, filepath : bpy.ops.avatar_toolkit.animx_importer(directory=directory,files=files,filepath=filepath)),
 }
 
@@ -0,0 +1,63 @@
+import bpy
+import numpy as np
+import numpy.typing as npt
+from typing import Optional, Sequence
+from bpy.types import Mesh
+
+def flip_uvs(uvs: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+    """Convert top-left origin UVs used by MMD to Blender's bottom-left origin"""
+    flipped = np.array(uvs[..., :2], dtype=np.float32)
+    flipped[..., 1] = 1.0 - flipped[..., 1]
+    return flipped
+
+def build_mesh(name: str,
+               positions: npt.NDArray[np.float32],
+               faces: npt.NDArray[np.int32],
+               normals: Optional[npt.NDArray[np.float32]] = None,
+               uvs: Optional[npt.NDArray[np.float32]] = None,
+               additional_uvs: Optional[npt.NDArray[np.float32]] = None) -> Mesh:
+    """Create a triangle mesh from vertex and face arrays using foreach_set bulk copies"""
+    vertex_count = len(positions)
+    face_count = len(faces)
+    loop_count = face_count * 3
+
+    mesh: Mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(vertex_count)
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(positions, dtype=np.float32).ravel())
+
+    loop_vertices = np.ascontiguousarray(faces, dtype=np.int32).ravel()
+    mesh.loops.add(loop_count)
+    mesh.loops.foreach_set("vertex_index", loop_vertices)
+
+    # loop_total is derived from consecutive loop starts since Blender 4.0
+    mesh.polygons.add(face_count)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, loop_count, 3, dtype=np.int32))
+    mesh.polygons.foreach_set("use_smooth", np.ones(face_count, dtype=bool))
+
+    if uvs is not None:
+        uv_layer = mesh.uv_layers.new(name="UVMap")
+        uv_layer.data.foreach_set("uv", flip_uvs(uvs)[loop_vertices].ravel())
+
+    if additional_uvs is not None:
+        for i in range(additional_uvs.shape[1]):
+            uv_layer = mesh.uv_layers.new(name=f"UV{i + 1}")
+            uv_layer.data.foreach_set("uv", flip_uvs(additional_uvs[:, i])[loop_vertices].ravel())
+
+    mesh.update(calc_edges=True)
+
+    if normals is not None:
+        mesh.normals_split_custom_set_from_vertices(np.ascontiguousarray(normals, dtype=np.float32))
+
+    return mesh
+
+def assign_face_materials(mesh: Mesh, slot_indices: Sequence[int], face_counts: Sequence[int]) -> None:
+    """Write the material index of every polygon at once from consecutive per-material face ranges"""
+    face_count = len(mesh.polygons)
+    material_indices = np.repeat(np.asarray(slot_indices, dtype=np.int32),
+                                 np.clip(np.asarray(face_counts, dtype=np.int64), 0, None))
+
+    # Ranges of malformed files may not add up to the face count, leftover faces keep slot 0
+    polygon_materials = np.zeros(face_count, dtype=np.int32)
+    covered = min(face_count, len(material_indices))
+    polygon_materials[:covered] = material_indices[:covered]
+    mesh.polygons.foreach_set("material_index", polygon_materials)
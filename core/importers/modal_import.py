@@ -0,0 +1,156 @@
+import os
+import bpy
+import time
+import threading
+import traceback
+from typing import Optional, Set
+from bpy.types import Operator, Context, Event
+from bpy_extras.io_utils import ImportHelper
+from ..logging_setup import logger
+from ..translations import t
+from .pmx_reader import PMXModel, read_pmx, pack_pmx_model, unpack_pmx_model
+from .parse_cache import ParseCache, get_parse_cache
+from .texture_cache import TextureCache
+from .import_pmx import BuildSteps, build_pmx_steps
+from .build_rollback import BuildRollback
+
+# Seconds of build work done per timer event before handing control back to Blender
+BUILD_TIME_BUDGET = 0.05
+TIMER_INTERVAL = 0.01
+
+# Share of the progress bar used by the parse stage, read_pmx reports up to 92%
+PARSE_PROGRESS_SHARE = 0.4
+PARSE_PROGRESS_END = 92
+
+class ParseJob(threading.Thread):
+    """Reads a PMX file on a background thread, the result is picked up by the modal operator"""
+    def __init__(self, filepath: str, parse_cache: Optional[ParseCache]):
+        super().__init__(name=f"PMXParse-{os.path.basename(filepath)}", daemon=True)
+        self.filepath: str = filepath
+        self.parse_cache: Optional[ParseCache] = parse_cache
+        self.model: Optional[PMXModel] = None
+        self.error: Optional[str] = None
+        self.percent: int = 0
+
+    def set_progress(self, percent: int) -> None:
+        self.percent = percent
+
+    def run(self) -> None:
+        try:
+            if self.parse_cache is None:
+                self.model = read_pmx(self.filepath, self.set_progress)
+            else:
+                self.model = self.parse_cache.fetch(self.filepath, "pmx",
+                                                    lambda path: read_pmx(path, self.set_progress),
+                                                    pack_pmx_model, unpack_pmx_model)
+        except Exception as e:
+            logger.error(f"PMX parse error: {str(e)}\n{traceback.format_exc()}")
+            self.error = str(e)
+
+    @property
+    def fraction(self) -> float:
+        return min(self.percent / PARSE_PROGRESS_END, 1.0)
+
+class AvatarToolkit_OT_ImportPMXModal(Operator, ImportHelper):
+    """Import a PMX model without blocking Blender, press Esc to cancel"""
+    bl_idname = "avatar_toolkit.import_pmx_modal"
+    bl_label = t("QuickAccess.import_pmx")
+    bl_description = t("QuickAccess.import_pmx_desc")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filter_glob: bpy.props.StringProperty(
+        default="*.pmx",
+        options={'HIDDEN'}
+    )
+
+    def execute(self, context: Context) -> Set[str]:
+        if not os.path.isfile(self.filepath):
+            self.report({'ERROR'}, t("QuickAccess.import_pmx_failed", error=f"File not found: {self.filepath}"))
+            return {'CANCELLED'}
+
+        self.model_name = os.path.basename(self.filepath)
+        self.rollback = BuildRollback()
+        self.texture_cache = TextureCache()
+        self.steps: Optional[BuildSteps] = None
+        self.stage = "parse"
+        self.progress = 0.0
+
+        # Preferences and the cache directory are read here, bpy is not safe to use on the worker
+        self.job = ParseJob(self.filepath, get_parse_cache())
+        self.job.start()
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        self.timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        self.update_status(context)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context: Context, event: Event) -> Set[str]:
+        if event.type == 'ESC':
+            return self.cancel_import(context, t("QuickAccess.import_pmx_cancelled"), {'WARNING'})
+        if event.type != 'TIMER' or event.timer != self.timer:
+            return {'PASS_THROUGH'}
+
+        if self.steps is None:
+            if self.job.is_alive():
+                self.progress = PARSE_PROGRESS_SHARE * self.job.fraction
+                self.update_status(context)
+                return {'RUNNING_MODAL'}
+            if self.job.error is not None or self.job.model is None:
+                return self.cancel_import(context, t("QuickAccess.import_pmx_failed", error=self.job.error), {'ERROR'})
+            self.steps = build_pmx_steps(self.job.model, self.filepath, self.texture_cache)
+
+        # Run build steps until the time budget for this event is spent
+        deadline = time.perf_counter() + BUILD_TIME_BUDGET
+        try:
+            while time.perf_counter() < deadline:
+                # Each step runs to completion before the user gets control back, so what
+                # the step creates is exactly what the rollback records
+                with self.rollback.track():
+                    self.stage, fraction = next(self.steps)
+                self.progress = PARSE_PROGRESS_SHARE + (1 - PARSE_PROGRESS_SHARE) * fraction
+        except StopIteration:
+            self.finish(context)
+            self.report({'INFO'}, t("QuickAccess.import_pmx_completed", name=self.model_name))
+            return {'FINISHED'}
+        except Exception as e:
+            logger.error(f"PMX build error: {str(e)}\n{traceback.format_exc()}")
+            return self.cancel_import(context, t("QuickAccess.import_pmx_failed", error=str(e)), {'ERROR'})
+
+        self.update_status(context)
+        return {'RUNNING_MODAL'}
+
+    def update_status(self, context: Context) -> None:
+        """Show the current stage in the status bar and the cursor progress indicator"""
+        percent = int(self.progress * 100)
+        context.window_manager.progress_update(percent)
+        context.workspace.status_text_set(t("QuickAccess.import_pmx_progress", name=self.model_name,
+                                            stage=t(f"QuickAccess.import_pmx_stage.{self.stage}"),
+                                            percent=percent))
+        for area in context.screen.areas:
+            area.tag_redraw()
+
+    def finish(self, context: Context) -> None:
+        """Remove the timer and clear the progress display"""
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def cancel_import(self, context: Context, message: str, level: Set[str]) -> Set[str]:
+        """Stop the build and remove everything it created so far"""
+        if self.steps is not None:
+            self.steps.close()
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        removed = self.rollback.remove()
+        logger.info(f"Rolled back PMX import of {self.model_name}, removed {removed} data blocks")
+        # A parse still running is left to finish on its own, its result is simply dropped
+        self.finish(context)
+        self.report(level, message)
+        return {'CANCELLED'}
+
+    def cancel(self, context: Context) -> None:
+        """Called by Blender when the modal handler is removed without finishing"""
+        self.cancel_import(context, t("QuickAccess.import_pmx_cancelled"), {'WARNING'})
@@ -0,0 +1,167 @@
+import numpy as np
+import numpy.typing as npt
+from typing import Any, Dict, List
+from .pmx_decoder import MORPH_TARGET_SECTIONS
+
+# Integrity checks and statistics for parsed PMX and PMD models, plain Python and NumPy like the readers
+
+# Faces with less area than this are reported as degenerate, in model units squared
+DEGENERATE_FACE_AREA = 1e-12
+
+# Vertex weight sums further than this from 1 are reported
+WEIGHT_SUM_TOLERANCE = 1e-3
+
+def validate_pmx_data(header_data, vertices, faces, materials, bones):
+    """Validate PMX data integrity"""
+    if not len(vertices):
+        raise ValueError("No vertices found in PMX file")
+    if not len(faces):
+        raise ValueError("No faces found in PMX file")
+    if not materials:
+        raise ValueError("No materials found in PMX file")
+    if not bones:
+        raise ValueError("No bones found in PMX file")
+    return True
+
+def count_out_of_range(indices: npt.ArrayLike, count: int, allow_none: bool = True) -> int:
+    """Number of indices outside a section of count items, -1 meaning none unless allow_none is False"""
+    indices = np.asarray(indices, dtype=np.int64)
+    lowest = -1 if allow_none else 0
+    return int(np.count_nonzero((indices < lowest) | (indices >= count)))
+
+def face_stats(positions: npt.NDArray[np.float32], faces: npt.NDArray[np.int32]) -> Dict[str, int]:
+    """Out of range face indices, and faces that repeat a vertex or have no area"""
+    out_of_range = (faces < 0) | (faces >= len(positions))
+    valid = ~out_of_range.any(axis=1)
+    valid_faces = faces[valid]
+
+    repeated = ((valid_faces[:, 0] == valid_faces[:, 1]) | (valid_faces[:, 1] == valid_faces[:, 2]) |
+                (valid_faces[:, 2] == valid_faces[:, 0]))
+    corners = positions[valid_faces].astype(np.float64)
+    cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    zero_area = np.einsum('ij,ij->i', cross, cross) <= (2 * DEGENERATE_FACE_AREA) ** 2
+    return {
+        "out_of_range_indices": int(np.count_nonzero(out_of_range)),
+        "degenerate": int(np.count_nonzero(repeated | zero_area)),
+    }
+
+def weight_stats(bone_indices: npt.NDArray[np.int32], bone_weights: npt.NDArray[np.float32],
+                 bone_count: int) -> Dict[str, Any]:
+    """Weight sum range and unnormalized vertices, with the weighted bone slots that point nowhere"""
+    sums = bone_weights.sum(axis=1, dtype=np.float64)
+    weighted = bone_weights > 0
+    bad_bones = weighted & ((bone_indices < 0) | (bone_indices >= bone_count))
+    return {
+        "min_sum": float(sums.min()) if len(sums) else 0.0,
+        "max_sum": float(sums.max()) if len(sums) else 0.0,
+        "unnormalized": int(np.count_nonzero(np.abs(sums - 1.0) > WEIGHT_SUM_TOLERANCE)),
+        "unweighted": int(np.count_nonzero(~weighted.any(axis=1))),
+        "out_of_range_bones": int(np.count_nonzero(bad_bones)),
+    }
+
+def pmx_model_stats(model) -> Dict[str, Any]:
+    """Section counts and integrity statistics of a parsed PMX model"""
+    vertices = model.vertices
+    section_sizes = {
+        "vertex": len(vertices),
+        "morph": len(model.morphs),
+        "bone": len(model.bones),
+        "material": len(model.materials),
+        "rigid_body": len(model.rigid_bodies),
+    }
+
+    morph_targets = 0
+    for morph in model.morphs:
+        section = MORPH_TARGET_SECTIONS.get(morph.morph_type, 'vertex')
+        # Only vertex and UV morph indices are unsigned, the others may use -1 for none
+        morph_targets += count_out_of_range(morph.indices, section_sizes[section], allow_none=section != 'vertex')
+
+    material_faces = sum(material.surface_count for material in model.materials)
+    out_of_range = {
+        "material_textures": count_out_of_range([index for material in model.materials
+                                                 for index in (material.texture_index,
+                                                               material.sphere_texture_index)],
+                                                len(model.textures)),
+        "bone_parents": count_out_of_range([bone.parent_index for bone in model.bones], len(model.bones)),
+        "ik_links": count_out_of_range([link[0] for bone in model.bones for link in bone.ik_links],
+                                       len(model.bones), allow_none=False),
+        "morph_targets": morph_targets,
+        "rigid_body_bones": count_out_of_range([body.bone_index for body in model.rigid_bodies],
+                                               len(model.bones)),
+        "joint_rigid_bodies": count_out_of_range([index for joint in model.joints
+                                                  for index in (joint.rigid_body_a, joint.rigid_body_b)],
+                                                 len(model.rigid_bodies)),
+    }
+
+    faces = face_stats(vertices.positions, model.faces)
+    weights = weight_stats(vertices.bone_indices, vertices.bone_weights, len(model.bones))
+    out_of_range["face_vertices"] = faces.pop("out_of_range_indices")
+    out_of_range["vertex_bones"] = weights.pop("out_of_range_bones")
+    return {
+        "format": "pmx",
+        "version": model.version,
+        "name": model.name,
+        "counts": {
+            "vertices": len(vertices),
+            "faces": len(model.faces),
+            "textures": len(model.textures),
+            "materials": len(model.materials),
+            "bones": len(model.bones),
+            "morphs": len(model.morphs),
+            "rigid_bodies": len(model.rigid_bodies),
+            "joints": len(model.joints),
+        },
+        "out_of_range": out_of_range,
+        "unassigned_faces": max(len(model.faces) - material_faces, 0),
+        "degenerate_faces": faces["degenerate"],
+        "weights": weights,
+    }
+
+def pmd_model_stats(model) -> Dict[str, Any]:
+    """Section counts and integrity statistics of a parsed PMD model"""
+    bone_count = len(model.bones)
+
+    # The base morph lists mesh vertices, every other morph indexes into that list
+    base_indices: List[np.ndarray] = [indices for _, morph_type, indices, _ in model.morphs if morph_type == 0]
+    base_count = len(base_indices[-1]) if base_indices else 0
+    morph_targets = sum(count_out_of_range(indices, len(model.positions) if morph_type == 0 else base_count,
+                                           allow_none=False)
+                        for _, morph_type, indices, _ in model.morphs)
+
+    ik_bones = [index for ik in model.iks for index in (ik[0], ik[1], *ik[5])]
+    material_faces = int(model.materials['vertex_count'].sum() // 3) if len(model.materials) else 0
+    faces = face_stats(model.positions, model.faces)
+    weights = weight_stats(model.bone_indices, model.bone_weights, bone_count)
+    return {
+        "format": "pmd",
+        "version": model.version,
+        "name": model.name,
+        "counts": {
+            "vertices": len(model.positions),
+            "faces": len(model.faces),
+            "materials": len(model.materials),
+            "bones": bone_count,
+            "iks": len(model.iks),
+            "morphs": len(model.morphs),
+        },
+        "out_of_range": {
+            "face_vertices": faces["out_of_range_indices"],
+            "vertex_bones": weights.pop("out_of_range_bones"),
+            "bone_parents": count_out_of_range(model.bones['parent'], bone_count),
+            "ik_bones": count_out_of_range(ik_bones, bone_count, allow_none=False),
+            "morph_targets": morph_targets,
+        },
+        "unassigned_faces": max(len(model.faces) - material_faces, 0),
+        "degenerate_faces": faces["degenerate"],
+        "weights": weights,
+    }
+
+MODEL_STATS = {
+    "pmx": pmx_model_stats,
+    "pmd": pmd_model_stats,
+}
+
+def issue_count(stats: Dict[str, Any]) -> int:
+    """Total number of integrity problems in model statistics"""
+    return (sum(stats["out_of_range"].values()) + stats["unassigned_faces"] +
+            stats["degenerate_faces"] + stats["weights"]["unnormalized"])
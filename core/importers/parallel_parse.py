@@ -0,0 +1,93 @@
+import os
+import sys
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .pmx_reader import read_pmx
+from .pmd_reader import read_pmd
+
+# Parse stage of the MMD importers, kept free of bpy so it can run in worker processes
+logger: logging.Logger = logging.getLogger(__name__)
+
+PARSERS: Dict[str, Callable[[str], Any]] = {
+    "pmx": read_pmx,
+    "pmd": read_pmd,
+}
+
+# Fresh worker interpreters do not know the namespace packages Blender creates for
+# extensions (bl_ext.<repository>), so they are rebuilt before any task is unpickled
+WORKER_BOOTSTRAP = """
+import sys, types
+for name, path in parent_packages:
+    if name not in sys.modules:
+        module = types.ModuleType(name)
+        module.__path__ = list(path)
+        sys.modules[name] = module
+"""
+
+ParseResult = Tuple[str, Optional[Any], Optional[str]]
+
+def model_format(filepath: str) -> str:
+    """Lowercase file extension without the dot"""
+    return os.path.splitext(filepath)[1].lower().lstrip('.')
+
+def parse_model_file(filepath: str) -> Any:
+    """Parse a PMX or PMD file, picking the reader from the extension"""
+    parser = PARSERS.get(model_format(filepath))
+    if parser is None:
+        raise ValueError(f"Unsupported model format: {filepath}")
+    return parser(filepath)
+
+def parent_packages() -> List[Tuple[str, List[str]]]:
+    """Name and search path of every package above the add-on that is not a plain directory on sys.path"""
+    addon_package = __package__.rsplit('.', 2)[0]
+    parts = addon_package.split('.')
+    packages = []
+    for depth in range(1, len(parts)):
+        name = '.'.join(parts[:depth])
+        module = sys.modules.get(name)
+        if module is not None and hasattr(module, "__path__"):
+            packages.append((name, list(module.__path__)))
+    return packages
+
+def create_worker_pool(worker_count: int) -> ProcessPoolExecutor:
+    """Process pool whose fresh interpreters can import the add-on's modules"""
+    return ProcessPoolExecutor(max_workers=worker_count,
+                               mp_context=multiprocessing.get_context('spawn'),
+                               initializer=exec,
+                               initargs=(WORKER_BOOTSTRAP, {"parent_packages": parent_packages()}))
+
+def parse_sequentially(filepaths: List[str]) -> List[ParseResult]:
+    """Parse model files one after another on the calling process"""
+    results = []
+    for filepath in filepaths:
+        try:
+            results.append((filepath, parse_model_file(filepath), None))
+        except Exception as e:
+            results.append((filepath, None, str(e)))
+    return results
+
+def parse_files(filepaths: List[str], max_workers: Optional[int] = None) -> List[ParseResult]:
+    """Parse model files across worker processes, returning (path, model, error) in input order"""
+    if len(filepaths) < 2:
+        return parse_sequentially(filepaths)
+
+    worker_count = min(len(filepaths), max_workers or os.cpu_count() or 1)
+    try:
+        with create_worker_pool(worker_count) as executor:
+            futures = [executor.submit(parse_model_file, filepath) for filepath in filepaths]
+            results = []
+            for filepath, future in zip(filepaths, futures):
+                try:
+                    results.append((filepath, future.result(), None))
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results.append((filepath, None, str(e)))
+            return results
+    except (BrokenProcessPool, OSError) as e:
+        # Worker processes are unavailable in some environments, parse on this process instead
+        logger.warning(f"Parallel parsing unavailable ({str(e)}), parsing sequentially")
+        return parse_sequentially(filepaths)
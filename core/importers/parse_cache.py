@@ -0,0 +1,155 @@
+import os
+import bpy
+import json
+import hashlib
+import numpy as np
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from bpy.types import Operator, Context
+from ..logging_setup import logger
+from ..translations import t
+from ..addon_preferences import get_preference
+
+# Bump whenever the cached layout of a parsed model changes
+CACHE_FORMAT_VERSION = 4
+DEFAULT_CACHE_SIZE_MB = 1024
+HASH_CHUNK_SIZE = 1 << 20
+
+CachedModel = Tuple[Dict[str, np.ndarray], Dict[str, Any]]
+
+def file_content_hash(filepath: str) -> str:
+    """Hash the whole file contents"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ParseCache:
+    """Size-bounded LRU cache of parsed model files stored as .npz sidecars"""
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+
+    def key(self, filepath: str, kind: str) -> str:
+        """Cache key from the file path, size, modification time and content hash"""
+        stat = os.stat(filepath)
+        parts = [str(CACHE_FORMAT_VERSION), kind, os.path.normcase(os.path.abspath(filepath)),
+                 str(stat.st_size), str(stat.st_mtime_ns), file_content_hash(filepath)]
+        return hashlib.blake2b("\0".join(parts).encode('utf-8'), digest_size=20).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[CachedModel]:
+        """Get the arrays and metadata stored under a key, None on a miss"""
+        path = self.entry_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files if name != "__meta__"}
+                meta = json.loads(data["__meta__"].tobytes().decode('utf-8'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable parse cache entry {path}: {str(e)}")
+            self.remove(path)
+            return None
+
+        # Touch the entry so eviction sees it as recently used, a read-only cache still serves hits
+        try:
+            os.utime(path)
+        except OSError as e:
+            logger.debug(f"Could not refresh parse cache entry {path}: {str(e)}")
+        return arrays, meta
+
+    def store(self, key: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+        """Write an entry atomically, then evict the least recently used entries over the size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        encoded_meta = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+        try:
+            with open(temp_path, 'wb') as f:
+                np.savez(f, __meta__=encoded_meta, **arrays)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write parse cache entry {path}: {str(e)}")
+            self.remove(temp_path)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits its size limit"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self) -> int:
+        """Remove every cache entry, returning how many were removed"""
+        removed = 0
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".npz"):
+                    removed += self.remove(entry.path)
+        return removed
+
+    def remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def fetch(self, filepath: str, kind: str, parse: Callable[[str], Any],
+              pack: Callable[[Any], CachedModel], unpack: Callable[[Dict[str, np.ndarray], Dict[str, Any]], Any]) -> Any:
+        """Return the cached parse of a file, parsing and storing it on a miss"""
+        key = self.key(filepath, kind)
+        cached = self.load(key)
+        if cached is not None:
+            logger.info(f"Loaded {os.path.basename(filepath)} from the parse cache")
+            return unpack(*cached)
+
+        model = parse(filepath)
+        self.store(key, *pack(model))
+        return model
+
+def parse_cache_directory() -> Optional[str]:
+    """Cache directory in the extension's user directory, None when not installed as an extension"""
+    addon_package = __package__.rsplit('.', 2)[0]
+    try:
+        return bpy.utils.extension_path_user(addon_package, path="parse_cache", create=True)
+    except ValueError:
+        # Not installed as an extension, there is no user directory to write to
+        return None
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Parse cache in the extension's user directory, None when disabled in the preferences"""
+    if not get_preference("enable_parse_cache", True):
+        return None
+    directory = parse_cache_directory()
+    if directory is None:
+        return None
+    max_mb = get_preference("parse_cache_size_mb", DEFAULT_CACHE_SIZE_MB)
+    return ParseCache(directory, int(max_mb) * 1024 * 1024)
+
+class AvatarToolkit_OT_ClearParseCache(Operator):
+    """Delete every cached parse of PMX and PMD files"""
+    bl_idname = "avatar_toolkit.clear_parse_cache"
+    bl_label = t("Settings.clear_parse_cache")
+    bl_description = t("Settings.clear_parse_cache_desc")
+
+    def execute(self, context: Context) -> Set[str]:
+        directory = parse_cache_directory()
+        # Clearing works while the cache is turned off, to free the space it used before
+        removed = ParseCache(directory, 0).clear() if directory is not None else 0
+        logger.info(f"Removed {removed} parse cache entries")
+        self.report({'INFO'}, t("Settings.parse_cache_cleared", count=removed))
+        return {'FINISHED'}
@@ -0,0 +1,164 @@
+import bpy
+import bmesh
+from mathutils import Euler, Matrix
+from typing import Dict, List, Optional, Sequence
+from bpy.types import Collection, Mesh, Object, Scene
+
+# PMX rigid body shape type -> Blender collision shape
+COLLISION_SHAPES: Dict[int, str] = {0: 'SPHERE', 1: 'BOX', 2: 'CAPSULE'}
+
+# Blender has 20 rigid body collision collections, PMX uses 16 groups
+COLLISION_COLLECTION_COUNT = 20
+
+def create_shape_templates(name: str) -> Dict[int, Mesh]:
+    """Build one unit-sized mesh per rigid body shape, shared by every body of that shape"""
+    templates: Dict[int, Mesh] = {}
+    for shape_type, shape_name in COLLISION_SHAPES.items():
+        bm = bmesh.new()
+        if shape_type == 0:
+            bmesh.ops.create_uvsphere(bm, u_segments=16, v_segments=8, radius=1.0)
+        elif shape_type == 1:
+            bmesh.ops.create_cube(bm, size=2.0)
+        else:
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=16, radius1=1.0, radius2=1.0, depth=2.0)
+        mesh = bpy.data.meshes.new(f"{name}_{shape_name.title()}")
+        bm.to_mesh(mesh)
+        bm.free()
+        templates[shape_type] = mesh
+    return templates
+
+def shape_scale(shape_type: int, size: Sequence[float]) -> tuple:
+    """Scale that turns a unit template into a PMX shape of the given size"""
+    if shape_type == 0:
+        return (size[0], size[0], size[0])
+    if shape_type == 1:
+        return tuple(size)
+    # Capsules store radius and height
+    return (size[0], size[0], size[1] / 2)
+
+def ensure_rigid_body_world(scene: Scene) -> bpy.types.RigidBodyWorld:
+    """Get the scene's rigid body world, creating it and its collections when missing"""
+    if scene.rigidbody_world is None:
+        # The world can only be created by operator, it needs nothing but a scene, so the scene and a
+        # window are passed explicitly and timer or modal callers work without an active area
+        override = {"scene": scene}
+        if bpy.context.window is None and bpy.context.window_manager.windows:
+            override["window"] = bpy.context.window_manager.windows[0]
+        with bpy.context.temp_override(**override):
+            bpy.ops.rigidbody.world_add()
+    rigidbody_world = scene.rigidbody_world
+    if rigidbody_world.collection is None:
+        rigidbody_world.collection = bpy.data.collections.new("RigidBodyWorld")
+    if rigidbody_world.constraints is None:
+        rigidbody_world.constraints = bpy.data.collections.new("RigidBodyConstraints")
+    return rigidbody_world
+
+def build_rigid_bodies(armature_obj: Object, rigid_bodies: list, collection: Collection,
+                       rigidbody_world: bpy.types.RigidBodyWorld) -> List[Object]:
+    """Create rigid body objects from PMX data without operators, sharing template meshes"""
+    templates = create_shape_templates(armature_obj.name)
+    rigid_body_objects: List[Object] = []
+
+    # Link everything first, linking to the world collection adds the rigid body settings
+    for rb in rigid_bodies:
+        shape_type = rb.shape_type if rb.shape_type in templates else 1
+        rb_obj = bpy.data.objects.new(f"RB_{rb.name}", templates[shape_type])
+        rb_obj.display_type = 'WIRE'
+        rb_obj.hide_render = True
+        collection.objects.link(rb_obj)
+        rigidbody_world.collection.objects.link(rb_obj)
+        rigid_body_objects.append(rb_obj)
+
+    for rb, rb_obj in zip(rigid_bodies, rigid_body_objects):
+        shape_type = rb.shape_type if rb.shape_type in templates else 1
+        rb_obj.matrix_basis = Matrix.LocRotScale(rb.position, Euler(rb.rotation), shape_scale(shape_type, rb.size))
+
+        settings = rb_obj.rigid_body
+        # Mode 0 bodies follow their bone, the others are driven by the simulation
+        settings.type = 'PASSIVE' if rb.mode == 0 else 'ACTIVE'
+        settings.kinematic = rb.mode == 0
+        settings.collision_shape = COLLISION_SHAPES[shape_type]
+        settings.mass = max(rb.mass, 0.001)
+        settings.linear_damping = rb.linear_damping
+        settings.angular_damping = rb.angular_damping
+        settings.restitution = rb.restitution
+        settings.friction = rb.friction
+        settings.collision_collections = [i == rb.group for i in range(COLLISION_COLLECTION_COUNT)]
+
+        # Every body lives in armature space, so the scale and rotation later applied to the
+        # armature carry over to it. Bone parenting waits until that transform is applied,
+        # see parent_rigid_bodies_to_bones
+        rb_obj.parent = armature_obj
+
+    return rigid_body_objects
+
+def parent_rigid_bodies_to_bones(armature_obj: Object, rigid_bodies: list, rigid_body_objects: List[Object],
+                                 bone_names: Sequence[str]) -> None:
+    """
+    Parent mode 0 bodies to their bone without operators, keeping their world placement.
+    Runs after the armature transform is applied, the parent inverse is taken from the final bone matrices
+    """
+    bpy.context.view_layer.update()
+    bone_inverses: Dict[str, Matrix] = {}
+    for rb, rb_obj in zip(rigid_bodies, rigid_body_objects):
+        if rb.mode != 0 or not 0 <= rb.bone_index < len(bone_names):
+            continue
+        bone = armature_obj.data.bones.get(bone_names[rb.bone_index])
+        if bone is None:
+            continue
+        if bone.name not in bone_inverses:
+            # Bone parents attach at the bone tail
+            bone_inverses[bone.name] = (armature_obj.matrix_world @ bone.matrix_local
+                                        @ Matrix.Translation((0.0, bone.length, 0.0))).inverted()
+        matrix_world = rb_obj.matrix_world.copy()
+        rb_obj.parent_type = 'BONE'
+        rb_obj.parent_bone = bone.name
+        rb_obj.matrix_parent_inverse = bone_inverses[bone.name]
+        rb_obj.matrix_basis = matrix_world
+
+def build_joints(armature_obj: Object, joints: list, rigid_body_objects: List[Object], collection: Collection,
+                 rigidbody_world: bpy.types.RigidBodyWorld, linear_scale: float = 1.0) -> List[Object]:
+    """
+    Create generic spring constraint empties between rigid body objects, in armature space.
+    Linear limits are not affected by object transforms, so they are scaled by linear_scale
+    """
+    joint_objects: List[Object] = []
+    for joint in joints:
+        empty = bpy.data.objects.new(f"Joint_{joint.name}", None)
+        empty.empty_display_type = 'ARROWS'
+        empty.empty_display_size = 0.1
+        collection.objects.link(empty)
+        rigidbody_world.constraints.objects.link(empty)
+        joint_objects.append(empty)
+
+    for joint, empty in zip(joints, joint_objects):
+        empty.parent = armature_obj
+        empty.location = joint.position
+        empty.rotation_euler = joint.rotation
+
+        constraint = empty.rigid_body_constraint
+        constraint.type = 'GENERIC_SPRING'
+        constraint.spring_type = 'SPRING2'
+        constraint.object1 = get_rigid_body_object(rigid_body_objects, joint.rigid_body_a)
+        constraint.object2 = get_rigid_body_object(rigid_body_objects, joint.rigid_body_b)
+
+        for i, axis in enumerate('xyz'):
+            setattr(constraint, f"use_limit_lin_{axis}", True)
+            setattr(constraint, f"limit_lin_{axis}_lower", joint.linear_limit_min[i] * linear_scale)
+            setattr(constraint, f"limit_lin_{axis}_upper", joint.linear_limit_max[i] * linear_scale)
+            setattr(constraint, f"use_limit_ang_{axis}", True)
+            setattr(constraint, f"limit_ang_{axis}_lower", joint.angular_limit_min[i])
+            setattr(constraint, f"limit_ang_{axis}_upper", joint.angular_limit_max[i])
+
+            translation_spring = max(joint.spring_constant_translation[i], 0.0)
+            rotation_spring = max(joint.spring_constant_rotation[i], 0.0)
+            setattr(constraint, f"use_spring_{axis}", translation_spring != 0)
+            setattr(constraint, f"spring_stiffness_{axis}", translation_spring)
+            setattr(constraint, f"use_spring_ang_{axis}", rotation_spring != 0)
+            setattr(constraint, f"spring_stiffness_ang_{axis}", rotation_spring)
+
+    return joint_objects
+
+def get_rigid_body_object(rigid_body_objects: List[Object], index: int) -> Optional[Object]:
+    """Look up a rigid body object by PMX index, None for out of range indices"""
+    return rigid_body_objects[index] if 0 <= index < len(rigid_body_objects) else None
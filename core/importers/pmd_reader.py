@@ -0,0 +1,204 @@
+import struct
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from .binary_reader import BinaryReader
+
+# Plain Python and NumPy only, like pmx_reader, so PMD files can be read without Blender
+
+def read_pmd_header(reader: BinaryReader):
+    # Read PMD header information
+    magic = reader.read_bytes(3)
+    if magic != b'Pmd':
+        raise ValueError("Invalid PMD file")
+    
+    version = reader.read_float()
+    
+    # Read additional header fields
+    model_name = reader.read_fixed_text(20)
+    comment = reader.read_fixed_text(256)
+    
+    return version, model_name, comment
+
+# Fixed-size PMD records, each section is decoded with a single frombuffer call
+PMD_VERTEX_DTYPE = np.dtype([
+    ('position', '<f4', (3,)),
+    ('normal', '<f4', (3,)),
+    ('uv', '<f4', (2,)),
+    ('bone_indices', '<u2', (2,)),
+    ('weight', '<u1'),
+    ('edge_flag', '<i1'),
+])
+
+PMD_MATERIAL_DTYPE = np.dtype([
+    ('diffuse', '<f4', (4,)),
+    ('specular_strength', '<f4'),
+    ('specular', '<f4', (3,)),
+    ('ambient', '<f4', (3,)),
+    ('toon_index', '<i1'),
+    ('edge_flag', '<i1'),
+    ('vertex_count', '<i4'),
+    ('texture', 'V20'),
+])
+
+PMD_BONE_DTYPE = np.dtype([
+    ('name', 'V20'),
+    ('parent', '<i2'),
+    ('tail', '<i2'),
+    ('type', '<i1'),
+    ('ik_parent', '<i2'),
+    ('position', '<f4', (3,)),
+])
+
+PMD_MORPH_HEADER_DTYPE = np.dtype([
+    ('name', 'V20'),
+    ('vertex_count', '<i4'),
+    ('type', '<i1'),
+])
+
+PMD_MORPH_VERTEX_DTYPE = np.dtype([
+    ('index', '<i4'),
+    ('offset', '<f4', (3,)),
+])
+
+PMD_IK_STRUCT = struct.Struct('<hhBhf')
+
+def read_records(reader: BinaryReader, dtype: np.dtype, count: int) -> np.ndarray:
+    """Decode count fixed-size records at the cursor and copy them out of the file buffer"""
+    if count < 0 or count * dtype.itemsize > reader.remaining():
+        raise ValueError(f"Invalid or truncated PMD section of {count} records at offset {reader.offset}")
+    records = np.frombuffer(reader.buffer, dtype=dtype, count=count, offset=reader.offset).copy()
+    reader.offset += count * dtype.itemsize
+    return records
+
+def decode_fixed_texts(fields: np.ndarray, encoding: str = 'shift-jis') -> List[str]:
+    """Decode a column of null-terminated fixed-size text fields with one decode call"""
+    if not len(fields):
+        return []
+    raw = fields.tobytes()
+    size = fields.dtype.itemsize
+    # Null bytes cannot occur inside a Shift-JIS character, so they can separate the names
+    joined = b'\0'.join(raw[i:i + size].split(b'\0', 1)[0] for i in range(0, len(raw), size))
+    return joined.decode(encoding, errors='replace').split('\0')
+
+def read_pmd_ik(reader: BinaryReader):
+    # Read PMD IK information
+    ik_bone_index, ik_target_bone_index, ik_chain_length, iterations, limit_angle = reader.read(PMD_IK_STRUCT)
+    ik_child_bone_indices = read_records(reader, np.dtype('<i2'), ik_chain_length).tolist()
+    
+    return ik_bone_index, ik_target_bone_index, ik_chain_length, iterations, limit_angle, ik_child_bone_indices
+
+def read_pmd_morphs(reader: BinaryReader, morph_count: int) -> list:
+    """Read the morph section, the vertices of each morph in one call"""
+    morphs = []
+    names = []
+    for _ in range(morph_count):
+        header = read_records(reader, PMD_MORPH_HEADER_DTYPE, 1)[0]
+        morph_vertices = read_records(reader, PMD_MORPH_VERTEX_DTYPE, int(header['vertex_count']))
+        names.append(header['name'])
+        morphs.append((int(header['type']), morph_vertices['index'].astype(np.int64), morph_vertices['offset']))
+    morph_names = decode_fixed_texts(np.array(names, dtype='V20'))
+    return [(name, morph_type, indices, offsets) for name, (morph_type, indices, offsets) in zip(morph_names, morphs)]
+
+class PMDModel:
+    """Everything read from a PMD file, ready to be built into Blender data"""
+    def __init__(self, version, name, comment, positions, normals, uvs, bone_indices, bone_weights,
+                 edge_flags, faces, materials, texture_names, bones, bone_names, iks, morphs):
+        self.version = version
+        self.name = name
+        self.comment = comment
+        self.positions = positions
+        self.normals = normals
+        self.uvs = uvs
+        self.bone_indices = bone_indices
+        self.bone_weights = bone_weights
+        self.edge_flags = edge_flags
+        self.faces = faces
+        # PMD_MATERIAL_DTYPE and PMD_BONE_DTYPE records, with their text fields decoded alongside
+        self.materials = materials
+        self.texture_names = texture_names
+        self.bones = bones
+        self.bone_names = bone_names
+        self.iks = iks
+        # (name, morph type, vertex indices, offsets)
+        self.morphs = morphs
+
+def read_pmd(filepath: str) -> PMDModel:
+    """Parse a PMD file without creating any Blender data"""
+    with BinaryReader.open(filepath) as reader:
+        version, model_name, comment = read_pmd_header(reader)
+        
+        vertices = read_records(reader, PMD_VERTEX_DTYPE, reader.read_int())
+        
+        # PMD stores faces as unsigned short triplets
+        face_index_count = reader.read_int()
+        faces = read_records(reader, np.dtype('<u2'), face_index_count)
+        faces = faces[:len(faces) - len(faces) % 3].astype(np.int32).reshape(-1, 3)
+        
+        materials = read_records(reader, PMD_MATERIAL_DTYPE, reader.read_int())
+        bones = read_records(reader, PMD_BONE_DTYPE, reader.read_uint16())
+        
+        # IK records vary in length with their chain
+        ik_count = reader.read_uint16()
+        iks = []
+        for _ in range(ik_count):
+            iks.append(read_pmd_ik(reader))
+        
+        morphs = read_pmd_morphs(reader, reader.read_uint16())
+    
+    # Unused bone slots hold 65535 and fall outside the bone range
+    first_weights = vertices['weight'].astype(np.float32) / 100
+    return PMDModel(version, model_name, comment,
+                    vertices['position'].copy(),
+                    vertices['normal'].copy(),
+                    vertices['uv'].copy(),
+                    vertices['bone_indices'].astype(np.int32),
+                    np.stack((first_weights, 1.0 - first_weights), axis=1),
+                    vertices['edge_flag'].copy(),
+                    faces, materials, decode_fixed_texts(materials['texture']),
+                    bones, decode_fixed_texts(bones['name']), iks, morphs)
+
+def pmd_material_keys(model: PMDModel) -> List[Tuple[str, Tuple[float, ...], Tuple[float, ...], float]]:
+    """One hashable key per material, materials with equal keys look the same and can share a slot
+
+    Each key is (texture file name, diffuse RGBA, specular RGB, specular strength).
+    """
+    materials = model.materials
+    # Sphere maps are appended to the texture name after a '*'
+    return [(texture_name.split('*')[0], tuple(diffuse), tuple(specular), float(specular_strength))
+            for texture_name, diffuse, specular, specular_strength in zip(model.texture_names,
+                                                                          materials['diffuse'].tolist(),
+                                                                          materials['specular'].tolist(),
+                                                                          materials['specular_strength'].tolist())]
+
+PMD_ARRAYS = ("positions", "normals", "uvs", "bone_indices", "bone_weights", "edge_flags", "faces",
+              "materials", "bones")
+
+def pack_pmd_model(model: PMDModel) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Split a parsed model into arrays and JSON metadata for the parse cache"""
+    arrays = {name: getattr(model, name) for name in PMD_ARRAYS}
+    arrays["morphs.offset_counts"] = np.array([len(indices) for _, _, indices, _ in model.morphs], dtype=np.int64)
+    arrays["morphs.vertex_indices"] = np.concatenate([np.zeros(0, dtype=np.int64)] +
+                                                     [indices for _, _, indices, _ in model.morphs])
+    arrays["morphs.offsets"] = np.concatenate([np.zeros((0, 3), dtype=np.float32)] +
+                                              [offsets for _, _, _, offsets in model.morphs])
+    meta = {
+        "version": model.version,
+        "name": model.name,
+        "comment": model.comment,
+        "texture_names": model.texture_names,
+        "bone_names": model.bone_names,
+        "iks": model.iks,
+        "morphs": [(morph_name, morph_type) for morph_name, morph_type, _, _ in model.morphs],
+    }
+    return arrays, meta
+
+def unpack_pmd_model(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> PMDModel:
+    """Rebuild a parsed model from parse cache arrays and metadata"""
+    ends = np.cumsum(arrays["morphs.offset_counts"])
+    starts = ends - arrays["morphs.offset_counts"]
+    morphs = [(morph_name, morph_type, arrays["morphs.vertex_indices"][start:end], arrays["morphs.offsets"][start:end])
+              for (morph_name, morph_type), start, end in zip(meta["morphs"], starts.tolist(), ends.tolist())]
+    return PMDModel(meta["version"], meta["name"], meta["comment"],
+                    *(arrays[name] for name in PMD_ARRAYS[:7]),
+                    arrays["materials"], meta["texture_names"], arrays["bones"], meta["bone_names"],
+                    meta["iks"], morphs)
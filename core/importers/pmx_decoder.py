@@ -0,0 +1,214 @@
+import numpy as np
+import numpy.typing as npt
+from typing import List, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Weight deform types stored in the PMX vertex record
+BDEF1 = 0
+BDEF2 = 1
+BDEF4 = 2
+SDEF = 3
+QDEF = 4
+
+# Number of bone indices and weights read for each weight deform type
+DEFORM_BONE_COUNTS: Tuple[int, ...] = (1, 2, 4, 2, 4)
+DEFORM_WEIGHT_COUNTS: Tuple[int, ...] = (0, 1, 4, 1, 4)
+
+# Morph types stored in the PMX morph record
+MORPH_GROUP = 0
+MORPH_VERTEX = 1
+MORPH_BONE = 2
+MORPH_UV = 3
+MORPH_ADDITIONAL_UV4 = 7
+MORPH_MATERIAL = 8
+MORPH_FLIP = 9
+MORPH_IMPULSE = 10
+
+# Number of floats in each morph offset record:
+# group and flip: weight
+# vertex: position offset
+# bone: translation and rotation quaternion
+# UV: four UV components
+# material: diffuse, specular, specular strength, ambient, edge color, edge size, texture, sphere and toon tints
+# impulse: velocity and torque
+MORPH_OFFSET_WIDTHS = {
+    MORPH_GROUP: 1, MORPH_VERTEX: 3, MORPH_BONE: 7,
+    3: 4, 4: 4, 5: 4, 6: 4, MORPH_ADDITIONAL_UV4: 4,
+    MORPH_MATERIAL: 28, MORPH_FLIP: 1, MORPH_IMPULSE: 6,
+}
+
+# Section the target indices of each morph type point into, every other type targets vertices
+MORPH_TARGET_SECTIONS = {
+    MORPH_GROUP: 'morph', MORPH_FLIP: 'morph', MORPH_BONE: 'bone',
+    MORPH_MATERIAL: 'material', MORPH_IMPULSE: 'rigid_body',
+}
+
+# Morph types with a byte between the index and the values, the material operation or the impulse local flag
+MORPH_OPERATION_TYPES = (MORPH_MATERIAL, MORPH_IMPULSE)
+
+# Records are gathered in chunks to keep the temporary byte index arrays small
+GATHER_CHUNK_SIZE = 16384
+
+INDEX_DTYPES = {
+    'vertex': {1: '<u1', 2: '<u2', 4: '<i4'},
+    'other': {1: '<i1', 2: '<i2', 4: '<i4'},
+}
+
+class PMXVertexArrays:
+    """Columnar storage for the PMX vertex section"""
+    __slots__ = ('positions', 'normals', 'uvs', 'additional_uvs', 'deform_types',
+                 'bone_indices', 'bone_weights', 'edge_scales')
+
+    def __init__(self, count: int, additional_uvs: int):
+        self.positions: npt.NDArray[np.float32] = np.zeros((count, 3), dtype=np.float32)
+        self.normals: npt.NDArray[np.float32] = np.zeros((count, 3), dtype=np.float32)
+        self.uvs: npt.NDArray[np.float32] = np.zeros((count, 2), dtype=np.float32)
+        self.additional_uvs: npt.NDArray[np.float32] = np.zeros((count, additional_uvs, 4), dtype=np.float32)
+        self.deform_types: npt.NDArray[np.uint8] = np.zeros(count, dtype=np.uint8)
+        self.bone_indices: npt.NDArray[np.int32] = np.full((count, 4), -1, dtype=np.int32)
+        self.bone_weights: npt.NDArray[np.float32] = np.zeros((count, 4), dtype=np.float32)
+        self.edge_scales: npt.NDArray[np.float32] = np.zeros(count, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+def index_dtype(index_size: int, unsigned_small: bool = False) -> str:
+    """Get the numpy dtype for a PMX index of the given byte size"""
+    table = INDEX_DTYPES['vertex'] if unsigned_small else INDEX_DTYPES['other']
+    if index_size not in table:
+        raise ValueError(f"Invalid PMX index size: {index_size}")
+    return table[index_size]
+
+def vertex_record_dtype(deform_type: int, additional_uvs: int, bone_index_size: int) -> np.dtype:
+    """Build the packed structured dtype of a vertex record with the given weight deform type"""
+    fields: List[Tuple] = [
+        ('position', '<f4', (3,)),
+        ('normal', '<f4', (3,)),
+        ('uv', '<f4', (2,)),
+    ]
+    if additional_uvs:
+        fields.append(('additional_uvs', '<f4', (additional_uvs, 4)))
+    fields.append(('deform_type', '<u1'))
+    fields.append(('bone_indices', index_dtype(bone_index_size), (DEFORM_BONE_COUNTS[deform_type],)))
+    if deform_type in (BDEF2, SDEF):
+        fields.append(('weight', '<f4'))
+    elif deform_type in (BDEF4, QDEF):
+        fields.append(('weights', '<f4', (4,)))
+    if deform_type == SDEF:
+        # C, R0 and R1 vectors, unused by the importer
+        fields.append(('sdef', '<f4', (3, 3)))
+    fields.append(('edge_scale', '<f4'))
+    return np.dtype(fields)
+
+def scan_vertex_records(data: Buffer, offset: int, count: int, additional_uvs: int,
+                        bone_index_size: int) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.uint8], int]:
+    """Find the start offset and weight deform type of every vertex record"""
+    prefix_size = 32 + 16 * additional_uvs
+    record_sizes = [vertex_record_dtype(t, additional_uvs, bone_index_size).itemsize
+                    for t in range(len(DEFORM_BONE_COUNTS))]
+    raw = np.frombuffer(data, dtype=np.uint8)
+
+    # Most models use a single deform type, which makes every record the same size
+    if count:
+        first_type = raw[offset + prefix_size] if offset + prefix_size < len(raw) else 255
+        if first_type < len(record_sizes):
+            size = record_sizes[first_type]
+            if offset + size * count <= len(raw):
+                uniform = raw[offset:offset + size * count].reshape(count, size)[:, prefix_size]
+                if (uniform == first_type).all():
+                    starts = np.arange(count, dtype=np.int64) * size + offset
+                    return starts, np.full(count, first_type, dtype=np.uint8), offset + size * count
+
+    starts: List[int] = [0] * count
+    types = bytearray(count)
+    position = offset
+    try:
+        for i in range(count):
+            deform_type = data[position + prefix_size]
+            starts[i] = position
+            types[i] = deform_type
+            position += record_sizes[deform_type]
+    except IndexError:
+        raise ValueError(f"Invalid or truncated vertex record at index {i}")
+
+    if position > len(raw):
+        raise ValueError("Vertex section extends past the end of the file")
+    return np.array(starts, dtype=np.int64), np.frombuffer(bytes(types), dtype=np.uint8), position
+
+def gather_records(raw: npt.NDArray[np.uint8], starts: npt.NDArray[np.int64], dtype: np.dtype) -> np.ndarray:
+    """Copy fixed-size records at arbitrary offsets into one structured array"""
+    records = np.empty(len(starts), dtype=dtype)
+    record_bytes = records.view(np.uint8).reshape(len(starts), dtype.itemsize)
+    byte_range = np.arange(dtype.itemsize, dtype=np.int64)
+    for chunk in range(0, len(starts), GATHER_CHUNK_SIZE):
+        chunk_starts = starts[chunk:chunk + GATHER_CHUNK_SIZE]
+        record_bytes[chunk:chunk + len(chunk_starts)] = raw[chunk_starts[:, None] + byte_range]
+    return records
+
+def decode_vertices(data: Buffer, offset: int, count: int, additional_uvs: int,
+                    bone_index_size: int) -> Tuple[PMXVertexArrays, int]:
+    """Decode the whole PMX vertex section into arrays, returning them with the end offset"""
+    starts, types, end = scan_vertex_records(data, offset, count, additional_uvs, bone_index_size)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    vertices = PMXVertexArrays(count, additional_uvs)
+    vertices.deform_types[:] = types
+
+    for deform_type in np.unique(types).tolist():
+        dtype = vertex_record_dtype(deform_type, additional_uvs, bone_index_size)
+        selection = np.flatnonzero(types == deform_type)
+        if len(selection) == count and count and starts[-1] - starts[0] == dtype.itemsize * (count - 1):
+            records = np.frombuffer(data, dtype=dtype, count=count, offset=int(starts[0]))
+        else:
+            records = gather_records(raw, starts[selection], dtype)
+
+        vertices.positions[selection] = records['position']
+        vertices.normals[selection] = records['normal']
+        vertices.uvs[selection] = records['uv']
+        if additional_uvs:
+            vertices.additional_uvs[selection] = records['additional_uvs']
+        vertices.edge_scales[selection] = records['edge_scale']
+
+        bone_count = DEFORM_BONE_COUNTS[deform_type]
+        vertices.bone_indices[selection, :bone_count] = records['bone_indices']
+        if deform_type == BDEF1:
+            vertices.bone_weights[selection, 0] = 1.0
+        elif deform_type in (BDEF2, SDEF):
+            vertices.bone_weights[selection, 0] = records['weight']
+            vertices.bone_weights[selection, 1] = 1.0 - records['weight']
+        else:
+            vertices.bone_weights[selection] = records['weights']
+
+    return vertices, end
+
+def decode_faces(data: Buffer, offset: int, index_count: int,
+                 vertex_index_size: int) -> Tuple[npt.NDArray[np.int32], int]:
+    """Decode the PMX face section into a (faces, 3) index array, returning it with the end offset"""
+    dtype = np.dtype(index_dtype(vertex_index_size, unsigned_small=True))
+    indices = np.frombuffer(data, dtype=dtype, count=index_count - index_count % 3, offset=offset)
+    return indices.astype(np.int32).reshape(-1, 3), offset + index_count * dtype.itemsize
+
+def morph_offset_dtype(morph_type: int, index_size: int) -> np.dtype:
+    """Packed structured dtype of one offset record of the given morph type"""
+    if morph_type not in MORPH_OFFSET_WIDTHS:
+        raise ValueError(f"Unknown PMX morph type: {morph_type}")
+    unsigned_small = morph_type == MORPH_VERTEX or MORPH_UV <= morph_type <= MORPH_ADDITIONAL_UV4
+    fields: List[Tuple] = [('index', index_dtype(index_size, unsigned_small))]
+    if morph_type in MORPH_OPERATION_TYPES:
+        fields.append(('operation', '<u1'))
+    fields.append(('offset', '<f4', (MORPH_OFFSET_WIDTHS[morph_type],)))
+    return np.dtype(fields)
+
+def decode_morph_offsets(data: Buffer, offset: int, count: int, morph_type: int, index_size: int
+                         ) -> Tuple[npt.NDArray[np.int32], npt.NDArray[np.float32], npt.NDArray[np.uint8], int]:
+    """
+    Decode the offsets of a morph into target index, (n, width) value and operation arrays,
+    returning them with the end offset
+    """
+    dtype = morph_offset_dtype(morph_type, index_size)
+    records = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+    # Copy out of the file buffer so the mapping can be closed once parsing is done
+    operations = (records['operation'].copy() if morph_type in MORPH_OPERATION_TYPES
+                  else np.zeros(0, dtype=np.uint8))
+    return (records['index'].astype(np.int32), records['offset'].copy(), operations,
+            offset + count * dtype.itemsize)
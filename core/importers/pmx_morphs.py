@@ -0,0 +1,94 @@
+import logging
+import numpy as np
+import numpy.typing as npt
+from typing import Dict, List, Tuple
+from .pmx_decoder import MORPH_GROUP, MORPH_VERTEX
+
+# Group morph evaluation, plain NumPy so it can run alongside the parser
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Groups nested deeper than this are cut off, reference cycles are removed before
+MAX_GROUP_DEPTH = 8
+
+# (vertex indices, per-vertex position offsets)
+VertexOffsets = Tuple[npt.NDArray[np.int32], npt.NDArray[np.float32]]
+
+def group_weight_matrices(morphs: list, group_ids: List[int], vertex_ids: List[int]
+                          ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Weights of every group morph on the other groups and on the vertex morphs"""
+    group_slots = np.full(len(morphs), -1, dtype=np.int64)
+    group_slots[group_ids] = np.arange(len(group_ids))
+    vertex_slots = np.full(len(morphs), -1, dtype=np.int64)
+    vertex_slots[vertex_ids] = np.arange(len(vertex_ids))
+
+    nested = np.zeros((len(group_ids), len(group_ids)))
+    direct = np.zeros((len(group_ids), len(vertex_ids)))
+    for row, morph_index in enumerate(group_ids):
+        morph = morphs[morph_index]
+        children = morph.indices.astype(np.int64)
+        weights = morph.offsets[:, 0].astype(np.float64)
+        valid = (children >= 0) & (children < len(morphs))
+        children, weights = children[valid], weights[valid]
+
+        # A child listed twice adds up, like in MMD
+        is_group = group_slots[children] >= 0
+        np.add.at(nested[row], group_slots[children[is_group]], weights[is_group])
+        is_vertex = vertex_slots[children] >= 0
+        np.add.at(direct[row], vertex_slots[children[is_vertex]], weights[is_vertex])
+    return nested, direct
+
+def cyclic_group_edges(nested: npt.NDArray[np.float64]) -> npt.NDArray[np.bool_]:
+    """References between groups that lead back to the referencing group, self-references included"""
+    reaches = nested != 0
+    # Transitive closure, reaches[i, j] when group j can be reached from group i
+    for k in range(len(reaches)):
+        reaches |= reaches[:, k:k + 1] & reaches[k:k + 1, :]
+    return (nested != 0) & reaches.T
+
+def flatten_group_morphs(morphs: list) -> Dict[int, VertexOffsets]:
+    """
+    Resolve every group morph to the summed vertex offsets of the vertex morphs it drives,
+    including through nested groups. Groups without any vertex effect are left out.
+    """
+    group_ids = [i for i, morph in enumerate(morphs) if morph.morph_type == MORPH_GROUP]
+    vertex_ids = [i for i, morph in enumerate(morphs) if morph.morph_type == MORPH_VERTEX]
+    if not group_ids or not vertex_ids:
+        return {}
+
+    # Effective weight on each vertex morph: direct + nested @ direct + nested^2 @ direct + ...
+    nested, direct = group_weight_matrices(morphs, group_ids, vertex_ids)
+    cyclic = cyclic_group_edges(nested)
+    if cyclic.any():
+        names = sorted({morphs[group_ids[row]].name for row in np.flatnonzero(cyclic.any(axis=1))})
+        logger.warning(f"Group morphs referencing themselves through a cycle, "
+                       f"those references are ignored: {', '.join(names)}")
+        nested[cyclic] = 0.0
+    effective = direct.copy()
+    term = direct
+    for depth in range(MAX_GROUP_DEPTH):
+        term = nested @ term
+        if not term.any():
+            break
+        effective += term
+    else:
+        if (nested @ term).any():
+            logger.warning(f"Group morphs nested deeper than {MAX_GROUP_DEPTH} levels, deeper levels are ignored")
+
+    # All vertex morph offsets as one sparse (morph, vertex) -> offset table
+    counts = np.array([len(morphs[i].indices) for i in vertex_ids], dtype=np.int64)
+    rows = np.repeat(np.arange(len(vertex_ids)), counts)
+    columns = np.concatenate([morphs[i].indices for i in vertex_ids]).astype(np.int64)
+    values = np.concatenate([morphs[i].offsets for i in vertex_ids]).astype(np.float64)
+
+    flattened: Dict[int, VertexOffsets] = {}
+    for row, morph_index in enumerate(group_ids):
+        entry_weights = effective[row][rows]
+        selected = np.flatnonzero(entry_weights)
+        if not len(selected):
+            continue
+        vertices, inverse = np.unique(columns[selected], return_inverse=True)
+        weighted = values[selected] * entry_weights[selected, None]
+        summed = np.stack([np.bincount(inverse, weights=weighted[:, axis], minlength=len(vertices))
+                           for axis in range(3)], axis=1)
+        flattened[morph_index] = (vertices.astype(np.int32), summed.astype(np.float32))
+    return flattened
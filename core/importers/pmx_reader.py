@@ -0,0 +1,580 @@
+import struct
+import numpy as np
+from typing import Any, Callable, Dict, Optional, Tuple
+from .pmx_decoder import (
+    PMXVertexArrays, decode_vertices, decode_faces, decode_morph_offsets, scan_vertex_records,
+    MORPH_OFFSET_WIDTHS, MORPH_OPERATION_TYPES, MORPH_TARGET_SECTIONS
+)
+from .binary_reader import BinaryReader, INT8, INT16, INT32, UINT8, UINT16
+from .model_validation import validate_pmx_data
+
+# Everything here is plain Python and NumPy so PMX files can be read without Blender
+
+# Encoding, additional UV count and the six index sizes
+HEADER_GLOBALS = struct.Struct('<8b')
+# Mass, linear and angular damping, restitution and friction
+RIGID_BODY_PARAMETERS = struct.Struct('<5f')
+
+class PMXBone:
+    __slots__ = ('name', 'english_name', 'position', 'parent_index', 'layer', 'flag',
+                 'tail_position', 'inherit_parent_index', 'inherit_influence', 'fixed_axis',
+                 'local_x', 'local_z', 'external_key', 'ik_target_index', 'ik_loop_count',
+                 'ik_limit_rad', 'ik_links', 'tail_index')
+
+    def __init__(self, name, english_name, position, parent_index, layer, flag, 
+                 tail_position, inherit_parent_index, inherit_influence, 
+                 fixed_axis, local_x, local_z, external_key, 
+                 ik_target_index, ik_loop_count, ik_limit_rad, ik_links, tail_index=-1):
+        self.name = name
+        self.english_name = english_name
+        self.position = position
+        self.parent_index = parent_index
+        self.layer = layer
+        self.flag = flag
+        self.tail_position = tail_position
+        self.inherit_parent_index = inherit_parent_index
+        self.inherit_influence = inherit_influence
+        self.fixed_axis = fixed_axis
+        self.local_x = local_x
+        self.local_z = local_z
+        self.external_key = external_key
+        self.ik_target_index = ik_target_index
+        self.ik_loop_count = ik_loop_count
+        self.ik_limit_rad = ik_limit_rad
+        self.ik_links = ik_links
+        self.tail_index = tail_index
+
+class PMXMaterial:
+    __slots__ = ('name', 'english_name', 'diffuse', 'specular', 'specular_strength', 'ambient',
+                 'flag', 'edge_color', 'edge_size', 'texture_index', 'sphere_texture_index',
+                 'sphere_mode', 'toon_sharing_flag', 'toon_texture_index', 'comment',
+                 'surface_count')
+
+    def __init__(self, name, english_name, diffuse, specular, specular_strength,
+                 ambient, flag, edge_color, edge_size, texture_index,
+                 sphere_texture_index, sphere_mode, toon_sharing_flag,
+                 toon_texture_index, comment, surface_count):
+        self.name = name
+        self.english_name = english_name
+        self.diffuse = diffuse
+        self.specular = specular
+        self.specular_strength = specular_strength
+        self.ambient = ambient
+        self.flag = flag
+        self.edge_color = edge_color
+        self.edge_size = edge_size
+        self.texture_index = texture_index
+        self.sphere_texture_index = sphere_texture_index
+        self.sphere_mode = sphere_mode
+        self.toon_sharing_flag = toon_sharing_flag
+        self.toon_texture_index = toon_texture_index
+        self.comment = comment
+        self.surface_count = surface_count
+
+class PMXMorph:
+    __slots__ = ('name', 'english_name', 'panel', 'morph_type', 'indices', 'offsets', 'operations')
+
+    def __init__(self, name, english_name, panel, morph_type, indices=None, offsets=None, operations=None):
+        self.name = name
+        self.english_name = english_name
+        self.panel = panel
+        self.morph_type = morph_type
+        # Offsets are kept as columns: (n,) target indices (vertex, bone, material or morph depending
+        # on the type), (n, width) float values and the per-offset operation byte of material and impulse morphs
+        self.indices = indices if indices is not None else np.zeros(0, dtype=np.int32)
+        self.offsets = (offsets if offsets is not None
+                        else np.zeros((0, MORPH_OFFSET_WIDTHS.get(morph_type, 0)), dtype=np.float32))
+        self.operations = operations if operations is not None else np.zeros(0, dtype=np.uint8)
+
+class PMXRigidBody:
+    __slots__ = ('name', 'bone_index', 'group', 'shape_type', 'size', 'position', 'rotation',
+                 'mass', 'linear_damping', 'angular_damping', 'restitution', 'friction', 'mode')
+
+    def __init__(self, name, bone_index, group, shape_type, size, position, rotation, mass, linear_damping, angular_damping, restitution, friction, mode):
+        self.name = name
+        self.bone_index = bone_index
+        self.group = group
+        self.shape_type = shape_type
+        self.size = size
+        self.position = position
+        self.rotation = rotation
+        self.mass = mass
+        self.linear_damping = linear_damping
+        self.angular_damping = angular_damping
+        self.restitution = restitution
+        self.friction = friction
+        self.mode = mode
+
+class PMXJoint:
+    __slots__ = ('name', 'joint_type', 'rigid_body_a', 'rigid_body_b', 'position', 'rotation',
+                 'linear_limit_min', 'linear_limit_max', 'angular_limit_min', 'angular_limit_max',
+                 'spring_constant_translation', 'spring_constant_rotation')
+
+    def __init__(self, name, joint_type, rigid_body_a, rigid_body_b, position, rotation, linear_limit_min, linear_limit_max, angular_limit_min, angular_limit_max, spring_constant_translation, spring_constant_rotation):
+        self.name = name
+        self.joint_type = joint_type
+        self.rigid_body_a = rigid_body_a
+        self.rigid_body_b = rigid_body_b
+        self.position = position
+        self.rotation = rotation
+        self.linear_limit_min = linear_limit_min
+        self.linear_limit_max = linear_limit_max
+        self.angular_limit_min = angular_limit_min
+        self.angular_limit_max = angular_limit_max
+        self.spring_constant_translation = spring_constant_translation
+        self.spring_constant_rotation = spring_constant_rotation
+
+def read_pmx_header(reader: BinaryReader):
+    magic = reader.read_bytes(4)
+    if magic != b'PMX ':
+        raise ValueError("Invalid PMX file")
+    
+    version = reader.read_float()
+    data_size = reader.read_int8()
+    encoding, additional_uvs, vertex_index_size, texture_index_size, \
+    material_index_size, bone_index_size, morph_index_size, rigid_body_index_size = reader.read(HEADER_GLOBALS)
+    # Later format revisions may append more globals
+    if data_size > 8:
+        reader.skip(data_size - 8)
+
+    reader.text_encoding = 'utf-8' if encoding == 1 else 'utf-16-le'
+    model_name = reader.read_text()
+    model_english_name = reader.read_text()
+    model_comment = reader.read_text()
+    model_english_comment = reader.read_text()
+
+    return (version, encoding, additional_uvs, vertex_index_size, texture_index_size, 
+            material_index_size, bone_index_size, morph_index_size, rigid_body_index_size,
+            model_name, model_english_name, model_comment, model_english_comment)
+
+# Index decoders by byte size, vertex indices are unsigned below 4 bytes
+INDEX_STRUCTS: Dict[int, struct.Struct] = {1: INT8, 2: INT16, 4: INT32}
+VERTEX_INDEX_STRUCTS: Dict[int, struct.Struct] = {1: UINT8, 2: UINT16, 4: INT32}
+
+def index_struct(index_size: int, structs: Dict[int, struct.Struct] = INDEX_STRUCTS) -> struct.Struct:
+    """Get the precompiled struct of a PMX index of the given byte size"""
+    if index_size not in structs:
+        raise ValueError(f"Invalid PMX index size: {index_size}")
+    return structs[index_size]
+
+class PMXIndexStructs:
+    """Index decoders of one file, picked once from the index sizes in its header"""
+    __slots__ = ('vertex', 'texture', 'material', 'bone', 'morph', 'rigid_body')
+
+    def __init__(self, vertex_index_size, texture_index_size, material_index_size,
+                 bone_index_size, morph_index_size, rigid_body_index_size):
+        self.vertex = index_struct(vertex_index_size, VERTEX_INDEX_STRUCTS)
+        self.texture = index_struct(texture_index_size)
+        self.material = index_struct(material_index_size)
+        self.bone = index_struct(bone_index_size)
+        self.morph = index_struct(morph_index_size)
+        self.rigid_body = index_struct(rigid_body_index_size)
+
+def morph_index_struct(indices: PMXIndexStructs, morph_type: int) -> struct.Struct:
+    """Index decoder for the targets of a morph type"""
+    return getattr(indices, MORPH_TARGET_SECTIONS.get(morph_type, 'vertex'))
+
+def read_morph(reader: BinaryReader, indices: PMXIndexStructs):
+    try:
+        name = reader.read_text()
+        english_name = reader.read_text()
+        
+        panel = reader.read_int8()
+        morph_type = reader.read_int8()
+        
+        # Read offset count with error checking
+        if reader.remaining() < 4:
+            return PMXMorph(name, english_name, panel, morph_type)
+            
+        offset_count = reader.read_int()
+        
+        target_indices, offsets, operations, reader.offset = decode_morph_offsets(
+            reader.buffer, reader.offset, offset_count, morph_type,
+            morph_index_struct(indices, morph_type).size)
+        return PMXMorph(name, english_name, panel, morph_type, target_indices, offsets, operations)
+    except:
+        return PMXMorph("", "", 0, 0)
+
+def read_material(reader: BinaryReader, indices: PMXIndexStructs):
+    material_name = reader.read_text()
+    material_english_name = reader.read_text()
+    
+    diffuse_color = reader.read_vec4()
+    specular_color = reader.read_vec3()
+    specular_strength = reader.read_float()
+    ambient_color = reader.read_vec3()
+    
+    flag = reader.read_int8()
+    edge_color = reader.read_vec4()
+    edge_size = reader.read_float()
+    
+    texture_index = reader.read(indices.texture)[0]
+    sphere_texture_index = reader.read(indices.texture)[0]
+    sphere_mode = reader.read_int8()
+    toon_sharing_flag = reader.read_int8()
+    
+    if toon_sharing_flag == 0:
+        toon_texture_index = reader.read(indices.texture)[0]
+    else:
+        toon_texture_index = reader.read_int8()
+    
+    comment = reader.read_text()
+    surface_count = int(reader.read_int()/3)
+    
+    return PMXMaterial(material_name, material_english_name, diffuse_color, specular_color,
+                      specular_strength, ambient_color, flag, edge_color, edge_size,
+                      texture_index, sphere_texture_index, sphere_mode,
+                      toon_sharing_flag, toon_texture_index, comment, surface_count)
+
+
+def read_bone(reader: BinaryReader, indices: PMXIndexStructs):
+    bone_name = reader.read_text()
+    bone_english_name = reader.read_text()
+    
+    bone_index = indices.bone
+    position = reader.read_vec3()
+    parent_bone_index = reader.read(bone_index)[0]
+    layer = reader.read_int()
+    flag = reader.read_uint16()
+    
+    tail_position = [None, None, None]
+    tail_index = -1
+    inherit_bone_parent_index = 0
+    inherit_bone_parent_influence = 0.0
+    fixed_axis = [0.0, 0.0, 0.0]
+    local_x_vector = [0.0, 0.0, 0.0]
+    local_z_vector = [0.0, 0.0, 0.0]
+    external_key = 0
+    ik_target_bone_index = 0
+    ik_loop_count = -1
+    ik_limit_radian = 0.0
+    ik_links = []
+    
+    if not (flag & 0x0001):
+        tail_position = reader.read_vec3()
+    else:
+        tail_index = reader.read(bone_index)[0]
+    
+    if flag & 0x0100 or flag & 0x0200:
+        inherit_bone_parent_index = reader.read(bone_index)[0]
+        inherit_bone_parent_influence = reader.read_float()
+    
+    if flag & 0x0400:
+        fixed_axis = reader.read_vec3()
+    
+    if flag & 0x0800:
+        local_x_vector = reader.read_vec3()
+        local_z_vector = reader.read_vec3()
+    
+    if flag & 0x2000:
+        external_key = reader.read_int()
+    
+    if flag & 0x0020:
+        ik_target_bone_index = reader.read(bone_index)[0]
+        ik_loop_count = reader.read_int()
+        ik_limit_radian = reader.read_float()
+        ik_link_count = reader.read_int()
+        
+        for _ in range(ik_link_count):
+            ik_link_bone_index = reader.read(bone_index)[0]
+            ik_link_limit = reader.read_int8()
+            if ik_link_limit == 1:
+                angle_limit = (reader.read_vec3(), reader.read_vec3())
+                ik_links.append((ik_link_bone_index, True, angle_limit))
+            else:
+                ik_links.append((ik_link_bone_index, False, None))
+    
+    return PMXBone(bone_name, bone_english_name, position, parent_bone_index, layer,
+                  flag, tail_position, inherit_bone_parent_index, inherit_bone_parent_influence,
+                  fixed_axis, local_x_vector, local_z_vector, external_key,
+                  ik_target_bone_index, ik_loop_count, ik_limit_radian, ik_links, tail_index)
+
+def read_display_frame(reader: BinaryReader, indices: PMXIndexStructs):
+    name = reader.read_text()
+    english_name = reader.read_text()
+    special_flag = reader.read_int8()
+    element_count = reader.read_int()
+    
+    elements = []
+    for _ in range(element_count):
+        element_type = reader.read_int8()
+        index = reader.read(indices.bone if element_type == 0 else indices.morph)[0]
+        elements.append((element_type, index))
+    
+    return name, english_name, special_flag, elements
+
+def read_rigid_body(reader: BinaryReader, indices: PMXIndexStructs):
+    name = reader.read_text()
+    english_name = reader.read_text()
+    
+    bone_index = reader.read(indices.bone)[0]
+    group = reader.read_uint8()
+    non_collision_mask = reader.read_uint16()
+    shape_type = reader.read_uint8()
+    size = reader.read_vec3()
+    position = reader.read_vec3()
+    rotation = reader.read_vec3()
+    mass, linear_damping, angular_damping, restitution, friction = reader.read(RIGID_BODY_PARAMETERS)
+    mode = reader.read_uint8()
+    
+    return PMXRigidBody(name, bone_index, group, shape_type, size, position, rotation,
+                        mass, linear_damping, angular_damping, restitution, friction, mode)
+
+def read_joint(reader: BinaryReader, indices: PMXIndexStructs):
+    name = reader.read_text()
+    english_name = reader.read_text()
+    
+    joint_type = reader.read_uint8()
+    rigid_body_a = reader.read(indices.rigid_body)[0]
+    rigid_body_b = reader.read(indices.rigid_body)[0]
+    position = reader.read_vec3()
+    rotation = reader.read_vec3()
+    linear_limit_min = reader.read_vec3()
+    linear_limit_max = reader.read_vec3()
+    angular_limit_min = reader.read_vec3()
+    angular_limit_max = reader.read_vec3()
+    spring_constant_translation = reader.read_vec3()
+    spring_constant_rotation = reader.read_vec3()
+    
+    return PMXJoint(name, joint_type, rigid_body_a, rigid_body_b, position, rotation,
+                    linear_limit_min, linear_limit_max, angular_limit_min, angular_limit_max,
+                    spring_constant_translation, spring_constant_rotation)
+
+
+def pmx_bone_names(bones: list[PMXBone]) -> list[str]:
+    """Names given to the edit bones, falling back to the English name or the bone index"""
+    return [bone_data.name or bone_data.english_name or f"bone_{i}" for i, bone_data in enumerate(bones)]
+
+
+class PMXModel:
+    """Everything read from a PMX file, ready to be built into Blender data"""
+    def __init__(self, version, additional_uvs, name, english_name, comment, english_comment,
+                 vertices, faces, textures, materials, bones, morphs, rigid_bodies, joints):
+        self.version = version
+        self.additional_uvs = additional_uvs
+        self.name = name
+        self.english_name = english_name
+        self.comment = comment
+        self.english_comment = english_comment
+        self.vertices = vertices
+        self.faces = faces
+        self.textures = textures
+        self.materials = materials
+        self.bones = bones
+        self.morphs = morphs
+        self.rigid_bodies = rigid_bodies
+        self.joints = joints
+
+def read_pmx(filepath: str, progress: Optional[Callable[[int], None]] = None) -> PMXModel:
+    """Parse a PMX file without creating any Blender data"""
+    if progress is None:
+        progress = lambda value: None
+
+    with BinaryReader.open(filepath) as reader:
+        # Read header (5%)
+        progress(5)
+        header_data = read_pmx_header(reader)
+        version, encoding, additional_uvs, vertex_index_size, texture_index_size, \
+        material_index_size, bone_index_size, morph_index_size, rigid_body_index_size, \
+        model_name, model_english_name, model_comment, model_english_comment = header_data
+
+        # Set up index decoders (10%)
+        progress(10)
+        indices = PMXIndexStructs(vertex_index_size, texture_index_size, material_index_size,
+                                  bone_index_size, morph_index_size, rigid_body_index_size)
+
+        # Read vertices (25%)
+        vertex_count = reader.read_int()
+        vertices, reader.offset = decode_vertices(reader.buffer, reader.offset, vertex_count,
+                                                  additional_uvs, bone_index_size)
+        progress(25)
+
+        # Read faces (35%)
+        progress(35)
+        face_index_count = reader.read_int()
+        faces, reader.offset = decode_faces(reader.buffer, reader.offset, face_index_count,
+                                            vertex_index_size)
+
+        # Read textures (45%)
+        progress(45)
+        texture_count = reader.read_int()
+        textures = []
+        for _ in range(texture_count):
+            textures.append(reader.read_text())
+
+        # Read materials (55%)
+        progress(55)
+        material_count = reader.read_int()
+        materials = []
+        for _ in range(material_count):
+            materials.append(read_material(reader, indices))
+
+        # Read bones (65%)
+        progress(65)
+        bone_count = reader.read_int()
+        bones = []
+        for _ in range(bone_count):
+            bones.append(read_bone(reader, indices))
+
+        # Read morphs (75%)
+        progress(75)
+        morph_count = reader.read_int()
+        morphs = []
+        for _ in range(morph_count):
+            morphs.append(read_morph(reader, indices))
+
+        # Read rigid bodies (85%)
+        progress(85)
+        try:
+            # Display frames sit between the morphs and the rigid bodies
+            if reader.remaining() >= 4:
+                display_frame_count = reader.read_int()
+                for _ in range(display_frame_count):
+                    read_display_frame(reader, indices)
+            if reader.remaining() >= 4:
+                rigid_body_count = reader.read_int()
+                rigid_bodies = []
+                for _ in range(rigid_body_count):
+                    rigid_bodies.append(read_rigid_body(reader, indices))
+            else:
+                rigid_bodies = []
+        except:
+            rigid_bodies = []
+
+        # Read joints (90%)
+        progress(90)
+        try:
+            if reader.remaining() >= 4:
+                joint_count = reader.read_int()
+                joints = []
+                for _ in range(joint_count):
+                    joints.append(read_joint(reader, indices))
+            else:
+                joints = []
+        except:
+            joints = []
+
+    # Validate data (92%)
+    progress(92)
+    validate_pmx_data(header_data, vertices, faces, materials, bones)
+
+    return PMXModel(version, additional_uvs, model_name, model_english_name, model_comment,
+                    model_english_comment, vertices, faces, textures, materials, bones, morphs,
+                    rigid_bodies, joints)
+
+def record_fields(record) -> Dict[str, Any]:
+    """Attribute values of a __slots__ record by name"""
+    return {name: getattr(record, name) for name in record.__slots__}
+
+def pack_pmx_model(model: PMXModel) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Split a parsed model into arrays and JSON metadata for the parse cache"""
+    arrays = {f"vertices.{name}": value for name, value in record_fields(model.vertices).items()}
+    arrays["faces"] = model.faces
+
+    # Morph offset columns are stored back to back with a count per morph, the values flattened
+    # since their width depends on the morph type
+    arrays["morphs.offset_counts"] = np.array([len(morph.indices) for morph in model.morphs], dtype=np.int64)
+    arrays["morphs.indices"] = np.concatenate([np.zeros(0, dtype=np.int32)] +
+                                              [morph.indices for morph in model.morphs])
+    arrays["morphs.offsets"] = np.concatenate([np.zeros(0, dtype=np.float32)] +
+                                              [morph.offsets.ravel() for morph in model.morphs])
+    arrays["morphs.operations"] = np.concatenate([np.zeros(0, dtype=np.uint8)] +
+                                                 [morph.operations for morph in model.morphs])
+
+    meta = {key: value for key, value in vars(model).items()
+            if key not in ("vertices", "faces", "materials", "bones", "morphs", "rigid_bodies", "joints")}
+    for section in ("materials", "bones", "rigid_bodies", "joints"):
+        meta[section] = [record_fields(record) for record in getattr(model, section)]
+    meta["morphs"] = [{key: value for key, value in record_fields(morph).items()
+                       if key not in ("indices", "offsets", "operations")}
+                      for morph in model.morphs]
+    return arrays, meta
+
+def unpack_pmx_model(arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> PMXModel:
+    """Rebuild a parsed model from parse cache arrays and metadata"""
+    vertices = PMXVertexArrays(0, 0)
+    for name in PMXVertexArrays.__slots__:
+        setattr(vertices, name, arrays[f"vertices.{name}"])
+
+    # Each morph gets views into the shared offset columns
+    morphs = []
+    target_indices = arrays["morphs.indices"]
+    offsets = arrays["morphs.offsets"]
+    operations = arrays["morphs.operations"]
+    start = value_start = operation_start = 0
+    for record, count in zip(meta["morphs"], arrays["morphs.offset_counts"].tolist()):
+        width = MORPH_OFFSET_WIDTHS.get(record["morph_type"], 0)
+        operation_count = count if record["morph_type"] in MORPH_OPERATION_TYPES else 0
+        morphs.append(PMXMorph(indices=target_indices[start:start + count],
+                               offsets=offsets[value_start:value_start + count * width].reshape(count, width),
+                               operations=operations[operation_start:operation_start + operation_count],
+                               **record))
+        start += count
+        value_start += count * width
+        operation_start += operation_count
+
+    return PMXModel(meta["version"], meta["additional_uvs"], meta["name"], meta["english_name"],
+                    meta["comment"], meta["english_comment"], vertices, arrays["faces"], meta["textures"],
+                    [PMXMaterial(**record) for record in meta["materials"]],
+                    [PMXBone(**record) for record in meta["bones"]],
+                    morphs,
+                    [PMXRigidBody(**record) for record in meta["rigid_bodies"]],
+                    [PMXJoint(**record) for record in meta["joints"]])
+
+
+class PMXSummary:
+    """Lightweight description of a PMX file, read without decoding its geometry"""
+    def __init__(self, filepath, version, name, english_name, comment, english_comment,
+                 vertex_count, face_count, texture_count, material_count, bone_count,
+                 morph_count, bone_names):
+        self.filepath = filepath
+        self.version = version
+        self.name = name
+        self.english_name = english_name
+        self.comment = comment
+        self.english_comment = english_comment
+        self.vertex_count = vertex_count
+        self.face_count = face_count
+        self.texture_count = texture_count
+        self.material_count = material_count
+        self.bone_count = bone_count
+        self.morph_count = morph_count
+        self.bone_names = bone_names
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+def inspect_pmx(filepath: str) -> PMXSummary:
+    """Read the header, counts and bone names of a PMX file, seeking past the geometry sections"""
+    with BinaryReader.open(filepath) as reader:
+        header_data = read_pmx_header(reader)
+        version, encoding, additional_uvs, vertex_index_size, texture_index_size, \
+        material_index_size, bone_index_size, morph_index_size, rigid_body_index_size, \
+        model_name, model_english_name, model_comment, model_english_comment = header_data
+
+        # Vertex records only vary in size with their weight deform type
+        vertex_count = reader.read_int()
+        _, _, reader.offset = scan_vertex_records(reader.buffer, reader.offset, vertex_count,
+                                                  additional_uvs, bone_index_size)
+
+        face_index_count = reader.read_int()
+        reader.skip(face_index_count * vertex_index_size)
+
+        texture_count = reader.read_int()
+        for _ in range(texture_count):
+            reader.skip(reader.read_int())
+
+        indices = PMXIndexStructs(vertex_index_size, texture_index_size, material_index_size,
+                                  bone_index_size, morph_index_size, rigid_body_index_size)
+        material_count = reader.read_int()
+        for _ in range(material_count):
+            read_material(reader, indices)
+
+        bone_count = reader.read_int()
+        bones = [read_bone(reader, indices) for _ in range(bone_count)]
+
+        morph_count = reader.read_int() if reader.remaining() >= 4 else 0
+
+    return PMXSummary(filepath, version, model_name, model_english_name, model_comment,
+                      model_english_comment, vertex_count, face_index_count // 3, texture_count,
+                      material_count, bone_count, morph_count, pmx_bone_names(bones))
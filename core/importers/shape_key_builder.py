@@ -0,0 +1,42 @@
+import numpy as np
+import numpy.typing as npt
+from typing import Iterable, Tuple
+from bpy.types import Object
+from ..addon_preferences import get_preference
+
+# (name, vertex indices, per-vertex offsets)
+MorphOffsets = Tuple[str, npt.NDArray[np.int64], npt.NDArray[np.float32]]
+
+def import_shape_key_tolerance() -> float:
+    """Offset below which morphs are skipped on import, in model units, 0 keeps every morph"""
+    return float(get_preference("import_shape_key_tolerance", 0.0))
+
+def build_shape_keys(obj: Object, morphs: Iterable[MorphOffsets], tolerance: float = 0.0) -> int:
+    """Create a shape key per morph by scattering its offsets onto the basis, skipping morphs within tolerance"""
+    mesh = obj.data
+    vertex_count = len(mesh.vertices)
+    basis: npt.NDArray[np.float32] = np.empty(vertex_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", basis)
+    basis = basis.reshape(-1, 3)
+    coordinates = np.empty_like(basis)
+
+    created = 0
+    for name, indices, offsets in morphs:
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        offsets = np.asarray(offsets, dtype=np.float32).reshape(-1, 3)
+        valid = (indices >= 0) & (indices < vertex_count)
+        indices, offsets = indices[valid], offsets[valid]
+
+        if tolerance > 0.0 and not (np.abs(offsets) > tolerance).any():
+            continue
+
+        if not mesh.shape_keys:
+            obj.shape_key_add(name="Basis", from_mix=False)
+        shape_key = obj.shape_key_add(name=name, from_mix=False)
+
+        coordinates[:] = basis
+        coordinates[indices] = basis[indices] + offsets
+        shape_key.data.foreach_set("co", coordinates.ravel())
+        created += 1
+
+    return created
@@ -0,0 +1,69 @@
+import os
+import bpy
+from typing import Dict, Optional, Set
+from bpy.types import Image
+from ..logging_setup import logger
+
+class TextureCache:
+    """Import-session cache of loaded images and case-insensitive directory listings"""
+    def __init__(self):
+        # Normalized absolute path -> loaded image, None when loading failed
+        self.images: Dict[str, Optional[Image]] = {}
+        # Directory -> {lowercase entry name: actual entry name}
+        self.directories: Dict[str, Dict[str, str]] = {}
+
+    def list_directory(self, directory: str) -> Dict[str, str]:
+        """Get the case-insensitive listing of a directory, reading it from disk only once"""
+        listing = self.directories.get(directory)
+        if listing is None:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                names = []
+            listing = {name.lower(): name for name in names}
+            self.directories[directory] = listing
+        return listing
+
+    def resolve(self, base_path: str, texture_name: str) -> Optional[str]:
+        """Find the file a texture path refers to, ignoring case and Windows path separators"""
+        if os.path.isabs(texture_name):
+            return texture_name if os.path.isfile(texture_name) else None
+
+        parts = [part for part in texture_name.replace('\\', '/').split('/') if part and part != '.']
+        if not parts:
+            return None
+
+        path = os.path.abspath(base_path)
+        for part in parts:
+            if part == '..':
+                path = os.path.dirname(path)
+                continue
+            name = self.list_directory(path).get(part.lower())
+            if name is None:
+                return None
+            path = os.path.join(path, name)
+        return path
+
+    def load(self, path: str) -> Optional[Image]:
+        """Load an image once per session, keyed by its normalized absolute path"""
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in self.images:
+            try:
+                self.images[key] = bpy.data.images.load(path, check_existing=True)
+            except RuntimeError as e:
+                logger.warning(f"Could not load texture {path}: {str(e)}")
+                self.images[key] = None
+        return self.images[key]
+
+    def discard(self, image_ids: Set[int]) -> None:
+        """Forget images that are about to be removed, by session id, so later loads create them again"""
+        self.images = {key: image for key, image in self.images.items()
+                       if image is None or image.session_uid not in image_ids}
+
+    def get(self, base_path: str, texture_name: str) -> Optional[Image]:
+        """Resolve a texture path relative to the model folder and return its image"""
+        path = self.resolve(base_path, texture_name)
+        if path is None:
+            logger.debug(f"Texture not found: {texture_name}")
+            return None
+        return self.load(path)
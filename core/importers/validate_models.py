@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional
+from .parallel_parse import PARSERS, model_format, parse_model_file, create_worker_pool
+from .model_validation import MODEL_STATS, issue_count
+
+# Headless integrity checks for MMD models, for CI jobs that should not start Blender:
+#   python -m avatar_toolkit.core.importers.validate_models [--workers N] [--strict] PATH...
+# Writes one JSON object per file to stdout as soon as the file is done
+logger: logging.Logger = logging.getLogger(__name__)
+
+def find_model_files(paths: List[str]) -> List[str]:
+    """Model files given directly, and every PMX or PMD file below the given directories"""
+    filepaths = []
+    for path in paths:
+        if not os.path.isdir(path):
+            filepaths.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            filepaths.extend(os.path.join(root, name) for name in sorted(files)
+                             if model_format(name) in PARSERS)
+    return filepaths
+
+def validate_model_file(filepath: str) -> Dict[str, Any]:
+    """Parse one model file and report its statistics, or the error that stopped the parse"""
+    start = time.perf_counter()
+    try:
+        model = parse_model_file(filepath)
+    except Exception as e:
+        return {"file": filepath, "ok": False, "error": f"{type(e).__name__}: {e}",
+                "parse_seconds": round(time.perf_counter() - start, 4)}
+    parse_seconds = time.perf_counter() - start
+
+    stats = MODEL_STATS[model_format(filepath)](model)
+    return {"file": filepath, "ok": True, "parse_seconds": round(parse_seconds, 4),
+            "issues": issue_count(stats), **stats}
+
+def iter_validation_results(filepaths: List[str], max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Validate model files across worker processes, yielding each report as its file finishes"""
+    worker_count = min(len(filepaths), max_workers or os.cpu_count() or 1)
+    pending = list(filepaths)
+    if worker_count > 1:
+        try:
+            with create_worker_pool(worker_count) as executor:
+                futures = {executor.submit(validate_model_file, filepath): filepath for filepath in filepaths}
+                for future in as_completed(futures):
+                    report = future.result()
+                    pending.remove(futures[future])
+                    yield report
+        except (BrokenProcessPool, OSError) as e:
+            # Worker processes are unavailable in some environments, finish on this process instead
+            logger.warning(f"Parallel validation unavailable ({str(e)}), validating sequentially")
+
+    for filepath in pending:
+        yield validate_model_file(filepath)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check PMX and PMD files and report statistics as JSON lines")
+    parser.add_argument("paths", nargs="+", help="model files or directories to search for them")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the CPU count")
+    parser.add_argument("--strict", action="store_true", help="also fail when a model parses but has issues")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    filepaths = find_model_files(args.paths)
+    failed = 0
+    for report in iter_validation_results(filepaths, args.workers):
+        sys.stdout.write(json.dumps(report, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        if not report["ok"] or (args.strict and report["issues"]):
+            failed += 1
+
+    if failed:
+        logger.warning(f"{failed} of {len(filepaths)} files failed validation")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
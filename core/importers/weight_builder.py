@@ -0,0 +1,52 @@
+import numpy as np
+import numpy.typing as npt
+from typing import List, Sequence, Tuple
+from bpy.types import Object, VertexGroup
+
+# Weights are snapped to this many steps per unit so equal weights share one add() call
+WEIGHT_QUANTIZATION_STEPS = 4096
+
+def bucket_weights(bone_indices: npt.NDArray[np.int32],
+                   bone_weights: npt.NDArray[np.float32],
+                   bone_count: int,
+                   steps: int = WEIGHT_QUANTIZATION_STEPS) -> List[Tuple[int, float, npt.NDArray[np.int64]]]:
+    """Sort vertex influences by bone and quantized weight into (bone, weight, vertex indices) buckets"""
+    vertex_count, influence_count = bone_indices.shape
+    vertices = np.repeat(np.arange(vertex_count, dtype=np.int64), influence_count)
+    bones = bone_indices.ravel().astype(np.int64)
+    weights = bone_weights.ravel().astype(np.float64)
+
+    valid = (bones >= 0) & (bones < bone_count) & (weights > 0)
+    vertices, bones, weights = vertices[valid], bones[valid], weights[valid]
+    if not len(bones):
+        return []
+
+    # A vertex can list the same bone more than once, those influences add up
+    keys, inverse = np.unique(bones * vertex_count + vertices, return_inverse=True)
+    summed = np.bincount(inverse.ravel(), weights=weights)
+    bones = keys // vertex_count
+    vertices = keys % vertex_count
+    levels = np.rint(np.clip(summed, 0.0, 1.0) * steps).astype(np.int64)
+
+    kept = levels > 0
+    bones, vertices, levels = bones[kept], vertices[kept], levels[kept]
+    if not len(bones):
+        return []
+
+    order = np.lexsort((vertices, levels, bones))
+    bones, vertices, levels = bones[order], vertices[order], levels[order]
+    boundaries = np.flatnonzero((np.diff(bones) != 0) | (np.diff(levels) != 0)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(bones)]))
+
+    return [(int(bones[start]), float(levels[start]) / steps, vertices[start:end])
+            for start, end in zip(starts.tolist(), ends.tolist())]
+
+def assign_vertex_weights(obj: Object, bone_names: Sequence[str],
+                          bone_indices: npt.NDArray[np.int32],
+                          bone_weights: npt.NDArray[np.float32]) -> List[VertexGroup]:
+    """Create a vertex group per bone and fill them with one add() call per (bone, weight) bucket"""
+    vertex_groups = [obj.vertex_groups.new(name=name) for name in bone_names]
+    for bone, weight, vertices in bucket_weights(bone_indices, bone_weights, len(bone_names)):
+        vertex_groups[bone].add(vertices.tolist(), weight, 'REPLACE')
+    return vertex_groups
@@ -30,6 +30,20 @@ def update_logging_state(self: PropertyGroup, context: Context) -> None:
     from .logging_setup import configure_logging
     configure_logging(self.enable_logging)
 
+def update_import_profiling(self: PropertyGroup, context: Context) -> None:
+    """Saves the import profiling preferences"""
+    save_preference("enable_import_profiling", self.enable_import_profiling)
+    save_preference("import_profiling_json_report", self.import_profiling_json_report)
+    save_preference("import_profiling_trace_memory", self.import_profiling_trace_memory)
+
+def update_parse_cache(self: PropertyGroup, context: Context) -> None:
+    """Saves the parse cache preference"""
+    save_preference("enable_parse_cache", self.enable_parse_cache)
+
+def update_shape_key_tolerance(self: PropertyGroup, context: Context) -> None:
+    """Saves the import shape key tolerance preference"""
+    save_preference("import_shape_key_tolerance", self.import_shape_key_tolerance)
+
 def update_shape_intensity(self: PropertyGroup, context: Context) -> None:
     """Updates shape key intensity and refreshes preview"""
     if self.viseme_preview_mode:
@@ -76,6 +90,44 @@ class AvatarToolkitSceneProperties(PropertyGroup):
         update=update_logging_state
     )
 
+    enable_parse_cache: BoolProperty(
+        name=t("Settings.enable_parse_cache"),
+        description=t("Settings.enable_parse_cache_desc"),
+        default=get_preference("enable_parse_cache", True),
+        update=update_parse_cache
+    )
+
+    import_shape_key_tolerance: FloatProperty(
+        name=t("Settings.import_shape_key_tolerance"),
+        description=t("Settings.import_shape_key_tolerance_desc"),
+        default=get_preference("import_shape_key_tolerance", 0.0),
+        min=0.0,
+        max=0.1,
+        precision=5,
+        update=update_shape_key_tolerance
+    )
+
+    enable_import_profiling: BoolProperty(
+        name=t("Settings.enable_import_profiling"),
+        description=t("Settings.enable_import_profiling_desc"),
+        default=get_preference("enable_import_profiling", False),
+        update=update_import_profiling
+    )
+
+    import_profiling_json_report: BoolProperty(
+        name=t("Settings.import_profiling_json_report"),
+        description=t("Settings.import_profiling_json_report_desc"),
+        default=get_preference("import_profiling_json_report", False),
+        update=update_import_profiling
+    )
+
+    import_profiling_trace_memory: BoolProperty(
+        name=t("Settings.import_profiling_trace_memory"),
+        description=t("Settings.import_profiling_trace_memory_desc"),
+        default=get_preference("import_profiling_trace_memory", False),
+        update=update_import_profiling
+    )
+
     debug_expand: BoolProperty(
         name="Debug Settings Expanded",
         default=False
@@ -1,13 +1,12 @@
 import bpy
-import re
-from typing import Set, Dict, List, Optional, Tuple
+import functools
+from typing import Any, Set, Dict, List, Optional, Tuple
 from bpy.types import (
     Operator, 
     Context, 
     Object, 
     Material, 
-    NodeTree,
-    ShaderNodeTexImage
+    NodeTree
 )
 from ...core.logging_setup import logger
 from ...core.translations import t
@@ -19,62 +18,101 @@ from ...core.common import (
     ProgressTracker
 )
 
-def textures_match(tex1: ShaderNodeTexImage, tex2: ShaderNodeTexImage) -> bool:
-    """Compare two texture nodes for matching properties and image data"""
-    return tex1.image == tex2.image and tex1.extension == tex2.extension
-
-def consolidate_nodes(node1: ShaderNodeTexImage, node2: ShaderNodeTexImage) -> None:
-    """Transfer properties from one texture node to another to ensure consistency"""
-    node2.color_space = node1.color_space
-    node2.coordinates = node1.coordinates
-    # Add UV map synchronization
-    if node1.texture_mapping and node2.texture_mapping:
-        node2.texture_mapping.vector_type = node1.texture_mapping.vector_type
-    if hasattr(node1, "uv_map") and hasattr(node2, "uv_map"):
-        node2.uv_map = node1.uv_map
-
-def consolidate_textures(node_tree1: NodeTree, node_tree2: NodeTree) -> None:
-    """Synchronize texture nodes between two material node trees"""
-    for node1 in node_tree1.nodes:
-        if node1.type == 'TEX_IMAGE':
-            for node2 in node_tree2.nodes:
-                if (node2.type == 'TEX_IMAGE' and node1.image == node2.image):
-                    consolidate_nodes(node1, node2)
-                    node2.image = node1.image
-        elif node1.type == 'GROUP':
-            if node1.node_tree and node2.node_tree:
-                consolidate_textures(node1.node_tree, node2.node_tree)
-
-def color_match(col1: Tuple[float, ...], col2: Tuple[float, ...], tolerance: float = 0.01) -> bool:
-    """Compare two color values within a specified tolerance"""
-    return all(abs(c1 - c2) < tolerance for c1, c2 in zip(col1, col2))
-
-def materials_match(mat1: Material, mat2: Material, tolerance: float = 0.01) -> bool:
+# Material values closer than this fall into the same fingerprint bucket
+MATERIAL_TOLERANCE = 0.01
+
+# Material settings that decide how a material is drawn outside its node tree
+MATERIAL_SETTINGS = ("diffuse_color", "roughness", "metallic", "alpha_threshold", "blend_method",
+                     "use_backface_culling")
+
+# Node settings stored as plain values, pointers are handled by pointer_fingerprint
+VALUE_PROPERTY_TYPES = {'BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM'}
+
+MaterialFingerprint = Tuple[Any, ...]
+
+def quantize(value: Any, tolerance: float = MATERIAL_TOLERANCE) -> Any:
+    """Round numbers, and each component of vectors and colors, to steps of tolerance"""
+    if isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)):
+        return round(value / tolerance)
+    if isinstance(value, bpy.types.ID):
+        return value.name_full
+    if isinstance(value, (set, frozenset)):
+        # Enum flag properties
+        return tuple(sorted(value))
+    try:
+        return tuple(round(component / tolerance) for component in value)
+    except TypeError:
+        return value
+
+@functools.lru_cache(maxsize=None)
+def base_node_properties() -> frozenset:
+    """Properties every shader node has, such as its name, location and selection state"""
+    return frozenset(prop.identifier for prop in bpy.types.ShaderNode.bl_rna.properties)
+
+def pointer_fingerprint(value: Any, tolerance: float, tree_cache: Dict[str, Tuple[Any, ...]]) -> Any:
+    """Node groups, data blocks, color ramps and curves a node points to, None for anything else"""
+    if isinstance(value, NodeTree):
+        # Node groups are shared between materials, each is fingerprinted once
+        if value.name_full not in tree_cache:
+            tree_cache[value.name_full] = node_tree_fingerprint(value, tolerance, tree_cache)
+        return tree_cache[value.name_full]
+    if isinstance(value, bpy.types.ID):
+        return value.name_full
+    if isinstance(value, bpy.types.ColorRamp):
+        return (value.color_mode, value.interpolation, value.hue_interpolation,
+                tuple((quantize(element.position, tolerance), quantize(element.color, tolerance))
+                      for element in value.elements))
+    if isinstance(value, bpy.types.CurveMapping):
+        return tuple(tuple(quantize(point.location, tolerance) for point in curve.points) for curve in value.curves)
+    return None
+
+def node_fingerprint(node: bpy.types.Node, tolerance: float, tree_cache: Dict[str, Tuple[Any, ...]]) -> Tuple[Any, ...]:
+    """
+    Node type, its own settings, the values of its unlinked inputs and of its outputs, keyed by socket
+    identifier. RGB, Value and similar nodes keep their value on the output socket
+    """
+    settings = []
+    for prop in node.bl_rna.properties:
+        if prop.identifier in base_node_properties():
+            continue
+        value = getattr(node, prop.identifier, None)
+        if prop.type in VALUE_PROPERTY_TYPES:
+            settings.append((prop.identifier, quantize(value, tolerance)))
+        elif prop.type == 'POINTER' and value is not None:
+            settings.append((prop.identifier, pointer_fingerprint(value, tolerance, tree_cache)))
+    inputs = tuple((socket.identifier, quantize(socket.default_value, tolerance))
+                   for socket in node.inputs
+                   if not socket.is_linked and hasattr(socket, "default_value"))
+    outputs = tuple((socket.identifier, quantize(socket.default_value, tolerance))
+                    for socket in node.outputs
+                    if hasattr(socket, "default_value"))
+    return (node.type, node.mute, tuple(settings), inputs, outputs)
+
+def node_tree_fingerprint(node_tree: NodeTree, tolerance: float,
+                          tree_cache: Dict[str, Tuple[Any, ...]]) -> Tuple[Any, ...]:
+    """
+    Every node with its settings and unlinked inputs, and every link between node sockets.
+    Nodes are described by content rather than name, so node names and order do not matter
+    """
+    nodes = {node.name: node_fingerprint(node, tolerance, tree_cache) for node in node_tree.nodes}
+    links = tuple(sorted(((nodes[link.from_node.name], link.from_socket.identifier,
+                           nodes[link.to_node.name], link.to_socket.identifier, link.is_muted)
+                          for link in node_tree.links if link.is_valid), key=repr))
+    return (tuple(sorted(nodes.values(), key=repr)), links)
+
+def material_fingerprint(mat: Material, tolerance: float = MATERIAL_TOLERANCE,
+                         tree_cache: Optional[Dict[str, Tuple[Any, ...]]] = None) -> MaterialFingerprint:
+    """Hashable summary of a material, materials with equal fingerprints can share one data block"""
+    settings = tuple(quantize(getattr(mat, name, None), tolerance) for name in MATERIAL_SETTINGS)
+    if mat.use_nodes and mat.node_tree:
+        return settings + node_tree_fingerprint(mat.node_tree, tolerance, {} if tree_cache is None else tree_cache)
+    return settings
+
+def materials_match(mat1: Material, mat2: Material, tolerance: float = MATERIAL_TOLERANCE) -> bool:
     """Compare two materials for matching properties within tolerance"""
-    if not color_match(mat1.diffuse_color, mat2.diffuse_color, tolerance):
-        return False
-    
-    if abs(mat1.roughness - mat2.roughness) > tolerance:
-        return False
-        
-    if abs(mat1.metallic - mat2.metallic) > tolerance:
-        return False
-        
-    if abs(mat1.alpha_threshold - mat2.alpha_threshold) > tolerance:
-        return False
-        
-    if not color_match(mat1.emission_color, mat2.emission_color, tolerance):
-        return False
-    
-    if mat1.node_tree and mat2.node_tree:
-        consolidate_textures(mat1.node_tree, mat2.node_tree)
-    
-    return True
-
-def get_base_name(name: str) -> str:
-    """Extract the base material name by removing numeric suffixes"""
-    mat_match = re.match(r"^(.*)\.\d{3}$", name)
-    return mat_match.group(1) if mat_match else name
+    return material_fingerprint(mat1, tolerance) == material_fingerprint(mat2, tolerance)
 
 class AvatarToolkit_OT_CombineMaterials(Operator):
     """Operator for combining similar materials to reduce duplicate materials"""
@@ -147,28 +185,25 @@ class AvatarToolkit_OT_CombineMaterials(Operator):
             return {'CANCELLED'}
 
     def consolidate_materials(self, meshes: List[Object]) -> int:
-        """Consolidate similar materials across all meshes"""
-        mat_mapping: Dict[str, Material] = {}
+        """Point every slot at the first material seen with the same fingerprint"""
+        fingerprints: Dict[str, MaterialFingerprint] = {}
+        tree_cache: Dict[str, Tuple[Any, ...]] = {}
+        kept: Dict[MaterialFingerprint, Material] = {}
         num_combined: int = 0
         
         for mesh in meshes:
             for slot in mesh.material_slots:
                 mat: Optional[Material] = slot.material
-                if mat:
-                    base_name: str = get_base_name(mat.name)
-                    
-                    if base_name in mat_mapping:
-                        base_mat: Material = mat_mapping[base_name]
-                        try:
-                            if materials_match(base_mat, mat):
-                                consolidate_textures(base_mat.node_tree, mat.node_tree)
-                                num_combined += 1
-                                slot.material = base_mat
-                        except AttributeError:
-                            logger.warning(f"Material attribute mismatch: {mat.name}")
-                            continue
-                    else:
-                        mat_mapping[base_name] = mat
+                if not mat:
+                    continue
+                # Each material is fingerprinted once, however many slots use it
+                fingerprint = fingerprints.get(mat.name_full)
+                if fingerprint is None:
+                    fingerprint = fingerprints[mat.name_full] = material_fingerprint(mat, tree_cache=tree_cache)
+                base_mat: Material = kept.setdefault(fingerprint, mat)
+                if base_mat != mat:
+                    slot.material = base_mat
+                    num_combined += 1
         
         return num_combined
 
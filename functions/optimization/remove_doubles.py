@@ -1,6 +1,9 @@
 import bpy
+import time
+import heapq
+import bmesh
 import numpy as np
-from typing import List, TypedDict, Any, Literal, TypeAlias, cast
+from typing import List, Optional, Tuple, TypedDict, Any, Literal, TypeAlias, cast
 from bpy.types import Operator, Context, Object, Event
 from ...core.logging_setup import logger
 from ...core.translations import t
@@ -9,11 +12,19 @@ from ...core.common import (
     get_all_meshes,
     validate_armature
 )
+from .vertex_merge import shape_key_safe_pairs, unmoved_pairs, merge_targets, merge_analysis
 
 # Constants
 MERGE_ITERATION_COUNT = 20
 MERGE_DISTANCE_DEFAULT = 0.0001
 
+# Seconds of merge work done per timer event before handing control back to Blender
+MERGE_TIME_BUDGET = 0.05
+TIMER_INTERVAL = 0.01
+
+# Shape keys listed per mesh in the analysis, the ones blocking the most pairs
+ANALYSIS_KEYS_SHOWN = 3
+
 # Type definitions
 ModalReturnType: TypeAlias = Literal['RUNNING_MODAL', 'FINISHED', 'CANCELLED']
 
@@ -21,38 +32,46 @@ class MeshEntry(TypedDict):
     mesh: Object
     shapekeys: list[str]
     vertices: int
-    cur_vertex_pass: int
-
-def create_duplicate_for_merge(context: Context, mesh: Object, shapekey_name: str) -> Object:
-    """Creates a duplicate mesh object for merge testing"""
-    context.view_layer.objects.active = mesh
-    bpy.ops.object.mode_set(mode='OBJECT')
-    bpy.ops.object.select_all(action='DESELECT')
-    mesh.select_set(True)
-    bpy.ops.object.duplicate()
-    bpy.ops.object.shape_key_move(type='TOP')
-    
-    duplicate = context.view_layer.objects.active
-    duplicate.name = f"{shapekey_name}_object_is_{mesh.name}"
-    return duplicate
-
-def process_vertex_merging(mesh_data: bpy.types.Mesh, vertices_original: dict[int, Any], current_vertex: int) -> list[int]:
-    """Process vertex merging and return merged vertex indices"""
-    merged_vertices = []
-    i, j = 0, 0
-    
-    while i < len(vertices_original):
-        if j + 1 > len(mesh_data.vertices):
-            merged_vertices.append(i)
-            j = j - 1
-        elif mesh_data.vertices[j].co.xyz != vertices_original[i]:
-            merged_vertices.append(i)
-            j = j - 1
-        elif vertices_original[i] == vertices_original[current_vertex]:
-            merged_vertices.append(i)
-        i, j = i + 1, j + 1
-    
-    return merged_vertices
+
+# (estimated cost, insertion order, mesh), the order keeps equal costs from comparing meshes
+QueueItem: TypeAlias = Tuple[int, int, MeshEntry]
+
+def estimate_merge_cost(mesh_entry: MeshEntry) -> int:
+    """Relative cost of merging a mesh, every shape key is another pass over its vertices"""
+    return max(mesh_entry["vertices"], 1) * max(len(mesh_entry["shapekeys"]), 1)
+
+def format_eta(seconds: float) -> str:
+    """Remaining time as m:ss"""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}:{seconds:02d}"
+
+def read_shape_key_coordinates(mesh_data: bpy.types.Mesh) -> np.ndarray:
+    """Coordinates of every shape key as one (keys, vertices, 3) array, the basis first"""
+    key_blocks = mesh_data.shape_keys.key_blocks if mesh_data.shape_keys else []
+    coordinates = np.empty((max(len(key_blocks), 1), len(mesh_data.vertices), 3), dtype=np.float32)
+    if not key_blocks:
+        mesh_data.vertices.foreach_get("co", coordinates[0].ravel())
+    for index, key_block in enumerate(key_blocks):
+        key_block.data.foreach_get("co", coordinates[index].ravel())
+    return coordinates
+
+def weld_vertices(mesh_data: bpy.types.Mesh, targets: np.ndarray) -> int:
+    """Merge each vertex into its target in one bmesh pass, shape keys and weights follow the kept vertex"""
+    merging = np.flatnonzero(targets != np.arange(len(targets)))
+    if not len(merging):
+        return 0
+
+    bm = bmesh.new()
+    try:
+        bm.from_mesh(mesh_data)
+        bm.verts.ensure_lookup_table()
+        verts = bm.verts
+        bmesh.ops.weld_verts(bm, targetmap={verts[i]: verts[t] for i, t in zip(merging.tolist(), targets[merging].tolist())})
+        bm.to_mesh(mesh_data)
+    finally:
+        bm.free()
+    mesh_data.update()
+    return len(merging)
 
 class AvatarToolkit_OT_RemoveDoublesAdvanced(Operator):
     bl_idname = "avatar_toolkit.remove_doubles_advanced"
@@ -81,7 +100,14 @@ class AvatarToolkit_OT_RemoveDoubles(Operator):
     bl_description = t("Optimization.remove_doubles_desc")
     bl_options = {'REGISTER', 'UNDO'}
 
-    objects_to_do: list[MeshEntry] = []
+    queue: List[QueueItem] = []
+    timer: Optional[bpy.types.Timer] = None
+    total_cost: int = 0
+    done_cost: int = 0
+    total_meshes: int = 0
+    done_meshes: int = 0
+    merged_vertices: int = 0
+    work_seconds: float = 0.0
 
     @classmethod
     def poll(cls, context: Context) -> bool:
@@ -109,8 +135,7 @@ class AvatarToolkit_OT_RemoveDoubles(Operator):
         mesh_entry: MeshEntry = {
             "mesh": mesh,
             "shapekeys": [],
-            "vertices": len(mesh.data.vertices),
-            "cur_vertex_pass": 0
+            "vertices": len(mesh.data.vertices)
         }
         
         if mesh.data.shape_keys:
@@ -129,153 +154,212 @@ class AvatarToolkit_OT_RemoveDoubles(Operator):
             bpy.ops.object.mode_set(mode='OBJECT')
             bpy.ops.object.select_all(action='DESELECT')
 
-            objects = get_all_meshes(context)
-            self.objects_to_do = []
+            # Smallest meshes first, so a cancelled run has merged as many meshes as it could
+            self.queue = []
+            seen_meshes = set()
+            for mesh in get_all_meshes(context):
+                if mesh.data.name in seen_meshes:
+                    continue
+                seen_meshes.add(mesh.data.name)
+                logger.debug(f"Setting up data for object {mesh.name}")
+                mesh_entry = self.setup_mesh_entry(mesh)
+                heapq.heappush(self.queue, (estimate_merge_cost(mesh_entry), len(self.queue), mesh_entry))
 
-            for mesh in objects:
-                if mesh.data.name not in [obj["mesh"].data.name for obj in self.objects_to_do]:
-                    logger.debug(f"Setting up data for object {mesh.name}")
-                    mesh_entry = self.setup_mesh_entry(mesh)
-                    self.objects_to_do.append(mesh_entry)
+            self.total_cost = sum(cost for cost, _, _ in self.queue)
+            self.done_cost = 0
+            self.total_meshes = len(self.queue)
+            self.done_meshes = 0
+            self.merged_vertices = 0
+            self.work_seconds = 0.0
 
-            context.window_manager.modal_handler_add(self)
+            wm = context.window_manager
+            self.timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+            wm.progress_begin(0, 100)
+            wm.modal_handler_add(self)
+            self.update_status(context)
             return {'RUNNING_MODAL'}
             
         except Exception as e:
             logger.error(f"Error in execute: {str(e)}")
             return {'CANCELLED'}
 
-    def modify_mesh(self, context: Context, mesh: MeshEntry) -> None:
-        """Basic mesh modification for simple cases"""
-        try:
-            mesh["mesh"].select_set(True)
-            context.view_layer.objects.active = mesh["mesh"]
-            mesh_data = mesh["mesh"].data
-            
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-            # Select vertices with different positions in shape keys
-            for index, point in enumerate(mesh["mesh"].active_shape_key.points):
-                if point.co.xyz != mesh_data.shape_keys.key_blocks[0].points[index].co.xyz:
-                    mesh_data.vertices[index].select = True
-                    logger.debug(f"Shapekey has moved vertex at index {index}")
-                    
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.object.mode_set(mode='OBJECT')
-            mesh["mesh"].select_set(False)
-            
-        except Exception as e:
-            logger.error(f"Error in modify_mesh: {str(e)}")
+    def modify_mesh(self, context: Context, mesh_entry: MeshEntry) -> int:
+        """Merge close vertices among those that no shape key moves"""
+        merge_distance = context.scene.avatar_toolkit.remove_doubles_merge_distance
+        mesh_data = mesh_entry["mesh"].data
+        coordinates = read_shape_key_coordinates(mesh_data)
 
-    def modify_mesh_advanced(self, context: Context, mesh_entry: MeshEntry) -> bool:
-        """Advanced mesh modification with shape key handling"""
-        try:
-            final_merged_vertex_group = []
-            initialized_final = False
-            merge_distance = context.scene.avatar_toolkit.remove_doubles_merge_distance
-
-            for shapekey_name in mesh_entry["shapekeys"]:
-                duplicate = create_duplicate_for_merge(context, mesh_entry["mesh"], shapekey_name)
-                vertices_original = {i: v.co.xyz for i, v in enumerate(duplicate.data.vertices)}
-                
-                # Process merging
-                merged_vertices = process_vertex_merging(duplicate.data, vertices_original, mesh_entry["cur_vertex_pass"])
-                
-                if not initialized_final:
-                    final_merged_vertex_group = merged_vertices.copy()
-                    initialized_final = True
-                else:
-                    final_merged_vertex_group = [v for v in final_merged_vertex_group if v in merged_vertices]
-                
-                bpy.ops.object.delete()
-
-            # Apply final merging
-            if final_merged_vertex_group:
-                self.apply_final_merging(context, mesh_entry, final_merged_vertex_group, merge_distance)
-                
-            return not (len(final_merged_vertex_group) > 1)
-            
-        except Exception as e:
-            logger.error(f"Error in modify_mesh_advanced: {str(e)}")
-            return True
-
-    def apply_final_merging(self, context: Context, mesh_entry: MeshEntry, vertex_group: list[int], merge_distance: float) -> None:
-        """Apply final vertex merging operations"""
-        mesh = mesh_entry["mesh"]
-        context.view_layer.objects.active = mesh
-        mesh.select_set(True)
-        
-        bpy.ops.object.mode_set(mode='OBJECT')
-        select_target_group = [False] * len(mesh.data.vertices)
-        for vertex_index in vertex_group:
-            select_target_group[vertex_index] = True
-            
-        mesh.data.vertices.foreach_set("select", select_target_group)
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.remove_doubles(threshold=merge_distance, use_unselected=False)
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-    def process_simple_mesh(self, context: Context, mesh: MeshEntry, merge_distance: float) -> None:
-        """Process mesh without shapekeys using simple merge operation"""
-        logger.debug(f"Processing mesh without shapekeys: {mesh['mesh'].name}")
-        mesh["mesh"].select_set(True)
-        context.view_layer.objects.active = mesh["mesh"]
-        bpy.ops.object.mode_set(mode='EDIT')
-        mesh["mesh"].data.vertices.foreach_set("select", [False] * len(mesh["mesh"].data.vertices))
-
-        bpy.ops.mesh.select_all(action="INVERT")
-        bpy.ops.mesh.remove_doubles(threshold=merge_distance, use_unselected=False)
-        bpy.ops.object.mode_set(mode='OBJECT')
-        mesh["mesh"].select_set(False)
-
-    def finish_mesh_processing(self, context: Context, mesh: MeshEntry, advanced: bool, merge_distance: float) -> None:
-        """Complete the mesh processing by performing final merge operations"""
-        logger.debug("Finishing mesh processing")
-        
-        if not advanced:
-            mesh["mesh"].select_set(True)
-            context.view_layer.objects.active = mesh["mesh"]
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action="INVERT")
-            bpy.ops.mesh.remove_doubles(threshold=merge_distance, use_unselected=False)
-            
-            bpy.ops.object.mode_set(mode='OBJECT')
-            mesh["mesh"].select_set(False)
+        candidates, static_pairs = unmoved_pairs(coordinates, merge_distance)
+        logger.debug(f"{mesh_entry['mesh'].name}: {len(static_pairs)} of {len(candidates)} close vertex pairs "
+                     f"are not moved by any shape key")
+        # Only the basis decides where the merged vertices end up, like merge_analysis without shape key safety
+        merged = weld_vertices(mesh_data, merge_targets(static_pairs, coordinates[:1], merge_distance))
+        logger.info(f"Merged {merged} vertices on {mesh_entry['mesh'].name}")
+        return merged
+
+    def modify_mesh_advanced(self, context: Context, mesh_entry: MeshEntry) -> int:
+        """Merge the vertex pairs that stay within the merge distance in the basis and every shape key"""
+        merge_distance = context.scene.avatar_toolkit.remove_doubles_merge_distance
+        mesh_data = mesh_entry["mesh"].data
+        coordinates = read_shape_key_coordinates(mesh_data)
+
+        candidates, safe_pairs = shape_key_safe_pairs(coordinates, merge_distance)
+        logger.debug(f"{mesh_entry['mesh'].name}: {len(safe_pairs)} of {len(candidates)} close vertex pairs "
+                     f"stay together in every shape key")
+        merged = weld_vertices(mesh_data, merge_targets(safe_pairs, coordinates, merge_distance))
+        logger.info(f"Merged {merged} vertices on {mesh_entry['mesh'].name}")
+        return merged
+
+    def update_status(self, context: Context) -> None:
+        """Show progress by estimated cost and the remaining time in the status bar"""
+        progress = self.done_cost / self.total_cost if self.total_cost else 1.0
+        percent = int(progress * 100)
+        # The remaining cost at the rate measured so far, only known once some work is done
+        if self.done_cost:
+            eta = format_eta(self.work_seconds / self.done_cost * (self.total_cost - self.done_cost))
+        else:
+            eta = "--:--"
+        context.window_manager.progress_update(percent)
+        context.workspace.status_text_set(t("Optimization.remove_doubles_progress",
+                                            name=self.queue[0][2]["mesh"].name if self.queue else "",
+                                            done=self.done_meshes, total=self.total_meshes,
+                                            percent=percent, eta=eta))
+        for area in context.screen.areas:
+            area.tag_redraw()
+
+    def finish(self, context: Context) -> None:
+        """Remove the timer and clear the progress display"""
+        wm = context.window_manager
+        if self.timer is not None:
+            wm.event_timer_remove(self.timer)
+            self.timer = None
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def cancel(self, context: Context) -> None:
+        """Called by Blender when the modal handler is removed without finishing"""
+        self.finish(context)
+
+    def merge_next(self, context: Context) -> None:
+        """Merge the cheapest mesh left in the queue"""
+        cost, _, mesh_entry = heapq.heappop(self.queue)
+        mesh_data = mesh_entry["mesh"].data
+        advanced = context.scene.avatar_toolkit.remove_doubles_advanced
+
+        start = time.perf_counter()
+        # Each mesh is loaded into bmesh once and written back once
+        if advanced and mesh_data.shape_keys:
+            self.merged_vertices += self.modify_mesh_advanced(context, mesh_entry)
+        else:
+            self.merged_vertices += self.modify_mesh(context, mesh_entry)
+        self.work_seconds += time.perf_counter() - start
+        self.done_cost += cost
+        self.done_meshes += 1
 
     def modal(self, context: Context, event: Event) -> set[ModalReturnType]:
-        """Modal operator execution"""
+        """Merge meshes until the time budget of this timer event is spent"""
         try:
-            if not self.objects_to_do:
-                self.report({'INFO'}, t("Optimization.remove_doubles_completed"))
-                logger.info("Finishing modal execution of merge doubles safely")
+            if event.type == 'ESC':
+                # Meshes are merged one at a time, the ones already done keep their result
+                self.finish(context)
+                self.report({'WARNING'}, t("Optimization.remove_doubles_cancelled",
+                                           done=self.done_meshes, total=self.total_meshes))
+                logger.info(f"Remove doubles cancelled after {self.done_meshes} of {self.total_meshes} meshes")
                 return {'FINISHED'}
 
-            mesh = self.objects_to_do[0]
-            mesh_data = mesh["mesh"].data
-            advanced = context.scene.avatar_toolkit.remove_doubles_advanced
-            merge_distance = context.scene.avatar_toolkit.remove_doubles_merge_distance
-
-            if len(mesh['shapekeys']) > 0 and not advanced:
-                shapekeyname = mesh['shapekeys'].pop(0)
-                mesh["mesh"].active_shape_key_index = mesh_data.shape_keys.key_blocks.find(shapekeyname)
-                logger.debug(f"Processing shapekey {shapekeyname}")
-                self.modify_mesh(context, mesh)
-                
-            elif not mesh_data.shape_keys:
-                self.process_simple_mesh(context, mesh, merge_distance)
-                self.objects_to_do.pop(0)
-                
-            elif not (mesh["cur_vertex_pass"] > mesh["vertices"]) and advanced:
-                if self.modify_mesh_advanced(context, mesh):
-                    mesh["cur_vertex_pass"] += 1
-                    
-            else:
-                self.finish_mesh_processing(context, mesh, advanced, merge_distance)
-                self.objects_to_do.pop(0)
+            if event.type != 'TIMER' or event.timer != self.timer:
+                return {'PASS_THROUGH'}
+
+            # A single mesh can run past the budget, it is never split between events
+            deadline = time.perf_counter() + MERGE_TIME_BUDGET
+            while self.queue and time.perf_counter() < deadline:
+                self.merge_next(context)
+
+            if not self.queue:
+                self.finish(context)
+                self.report({'INFO'}, t("Optimization.remove_doubles_completed"))
+                logger.info(f"Finishing modal execution of merge doubles safely, "
+                            f"merged {self.merged_vertices} vertices in {self.work_seconds:.2f}s")
+                return {'FINISHED'}
 
+            self.update_status(context)
             return {'RUNNING_MODAL'}
             
         except Exception as e:
             logger.error(f"Error in modal: {str(e)}")
+            self.finish(context)
             return {'CANCELLED'}
+
+class AvatarToolkit_OT_RemoveDoublesAnalyze(Operator):
+    bl_idname = "avatar_toolkit.remove_doubles_analyze"
+    bl_label = t("Optimization.remove_doubles_analyze")
+    bl_description = t("Optimization.remove_doubles_analyze_desc")
+    bl_options = {'REGISTER'}
+
+    # (mesh name, shape key names, coordinates), read once when the dialog opens
+    meshes: List[Tuple[str, List[str], np.ndarray]] = []
+    reports: List[dict[str, Any]] = []
+    analysis_settings: Optional[Tuple[float, bool]] = None
+
+    @classmethod
+    def poll(cls, context: Context) -> bool:
+        """Check if the operator can be executed"""
+        armature = get_active_armature(context)
+        if not armature:
+            return False
+        valid, _ = validate_armature(armature)
+        return valid
+
+    def invoke(self, context: Context, event: Event) -> set[str]:
+        """Read the coordinates of every mesh and open the report"""
+        self.meshes = []
+        seen_meshes = set()
+        for mesh in get_all_meshes(context):
+            if mesh.data.name in seen_meshes:
+                continue
+            seen_meshes.add(mesh.data.name)
+            key_names = [key.name for key in mesh.data.shape_keys.key_blocks[1:]] if mesh.data.shape_keys else []
+            self.meshes.append((mesh.name, key_names, read_shape_key_coordinates(mesh.data)))
+        self.reports = []
+        self.analysis_settings = None
+        return context.window_manager.invoke_props_dialog(self, width=450)
+
+    def update_reports(self, context: Context) -> None:
+        """Analyze again when the merge distance or mode changed since the last draw"""
+        settings = context.scene.avatar_toolkit
+        analysis_settings = (settings.remove_doubles_merge_distance, settings.remove_doubles_advanced)
+        if analysis_settings == self.analysis_settings:
+            return
+        merge_distance, advanced = analysis_settings
+        self.reports = [{"name": name, "keys": key_names, **merge_analysis(coordinates, merge_distance, advanced)}
+                        for name, key_names, coordinates in self.meshes]
+        self.analysis_settings = analysis_settings
+
+    def draw(self, context: Context) -> None:
+        """Draw the settings and what they would merge on each mesh"""
+        layout = self.layout
+        layout.prop(context.scene.avatar_toolkit, "remove_doubles_merge_distance")
+        layout.prop(context.scene.avatar_toolkit, "remove_doubles_advanced")
+        self.update_reports(context)
+
+        for report in self.reports:
+            col = layout.box().column(align=True)
+            col.label(text=t("Optimization.remove_doubles_analysis_mesh", **report), icon='MESH_DATA')
+            blocked_by_key = report["blocked_by_key"]
+            for index in np.argsort(-blocked_by_key, kind='stable')[:ANALYSIS_KEYS_SHOWN].tolist():
+                if blocked_by_key[index]:
+                    col.label(text=t("Optimization.remove_doubles_analysis_key", name=report["keys"][index],
+                                     count=int(blocked_by_key[index])), icon='SHAPEKEY_DATA')
+        layout.label(text=t("Optimization.remove_doubles_analysis_total",
+                            merged=sum(report["merged"] for report in self.reports)))
+
+    def execute(self, context: Context) -> set[str]:
+        """Log the report, nothing is changed"""
+        self.update_reports(context)
+        for report in self.reports:
+            blocking = {name: int(count) for name, count in zip(report["keys"], report["blocked_by_key"]) if count}
+            logger.info(f"{report['name']}: {report['merged']} of {report['vertices']} vertices would merge, "
+                        f"{report['candidates']} close pairs, {report['blocked']} blocked by {blocking}")
+        self.report({'INFO'}, t("Optimization.remove_doubles_analysis_total",
+                                merged=sum(report["merged"] for report in self.reports)))
+        return {'FINISHED'}
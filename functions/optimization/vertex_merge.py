@@ -0,0 +1,167 @@
+import numpy as np
+import numpy.typing as npt
+from typing import Any, Dict, Tuple
+
+# Coincident vertex search for remove doubles, plain NumPy so it works on whole coordinate arrays
+
+# Cell offsets that pair each grid cell with half of its 26 neighbours, the other half is
+# covered when the neighbour looks back
+NEIGHBOUR_OFFSETS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                              if (dx, dy, dz) > (0, 0, 0)], dtype=np.int64)
+
+# Largest number of cells per axis, keeps the packed cell keys inside int64
+MAX_CELLS_PER_AXIS = 1 << 20
+
+def expand_cell_pairs(order: npt.NDArray[np.int64], starts_a: npt.NDArray[np.int64], counts_a: npt.NDArray[np.int64],
+                      starts_b: npt.NDArray[np.int64], counts_b: npt.NDArray[np.int64],
+                      same_cell: bool) -> npt.NDArray[np.int64]:
+    """Every vertex pair between the members of cell a and cell b, for each (a, b) given"""
+    sizes = counts_a * counts_b
+    total = int(sizes.sum())
+    if not total:
+        return np.zeros((0, 2), dtype=np.int64)
+    cell = np.repeat(np.arange(len(sizes)), sizes)
+    local = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    member_a = local // counts_b[cell]
+    member_b = local % counts_b[cell]
+    if same_cell:
+        # Each unordered pair once, and no vertex paired with itself
+        keep = member_a < member_b
+        cell, member_a, member_b = cell[keep], member_a[keep], member_b[keep]
+    return np.stack((order[starts_a[cell] + member_a], order[starts_b[cell] + member_b]), axis=1)
+
+def candidate_pairs(points: npt.NDArray[np.float32], distance: float) -> npt.NDArray[np.int64]:
+    """Vertex pairs in the same or neighbouring grid cells of size distance, a superset of the close pairs"""
+    if len(points) < 2:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    points = points.astype(np.float64)
+    low = points.min(axis=0)
+    # Very small distances on large meshes get bigger cells, which only adds candidates
+    cell_size = max(distance, float((points.max(axis=0) - low).max()) / (MAX_CELLS_PER_AXIS - 3), 1e-12)
+    # Cells start at 1 so every neighbour offset stays inside the packed key range
+    cells = np.floor((points - low) / cell_size).astype(np.int64) + 1
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    order = np.argsort(keys, kind='stable')
+    cell_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    starts = starts.astype(np.int64)
+    counts = counts.astype(np.int64)
+
+    pairs = [expand_cell_pairs(order, starts, counts, starts, counts, same_cell=True)]
+    for dx, dy, dz in NEIGHBOUR_OFFSETS.tolist():
+        neighbour_keys = cell_keys + (dx * dims[1] + dy) * dims[2] + dz
+        found = np.searchsorted(cell_keys, neighbour_keys)
+        found = np.minimum(found, len(cell_keys) - 1)
+        has_neighbour = np.flatnonzero(cell_keys[found] == neighbour_keys)
+        if len(has_neighbour):
+            neighbours = found[has_neighbour]
+            pairs.append(expand_cell_pairs(order, starts[has_neighbour], counts[has_neighbour],
+                                           starts[neighbours], counts[neighbours], same_cell=False))
+    return np.concatenate(pairs)
+
+def pairs_within(points: npt.NDArray[np.float32], pairs: npt.NDArray[np.int64], distance: float) -> npt.NDArray[np.bool_]:
+    """Which pairs are at most distance apart"""
+    delta = points[pairs[:, 0]].astype(np.float64) - points[pairs[:, 1]]
+    return np.einsum('ij,ij->i', delta, delta) <= distance * distance
+
+def coincident_pairs(points: npt.NDArray[np.float32], distance: float) -> npt.NDArray[np.int64]:
+    """All vertex pairs at most distance apart"""
+    pairs = candidate_pairs(points, distance)
+    return pairs[pairs_within(points, pairs, distance)]
+
+def unmoved_vertices(coordinates: npt.NDArray[np.float32]) -> npt.NDArray[np.bool_]:
+    """Which vertices keep their basis position in every shape key of the (keys, vertices, 3) coordinates"""
+    unmoved = np.ones(coordinates.shape[1], dtype=bool)
+    for key_coordinates in coordinates[1:]:
+        unmoved &= (key_coordinates == coordinates[0]).all(axis=1)
+    return unmoved
+
+def unmoved_pairs(coordinates: npt.NDArray[np.float32], distance: float) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Pairs coincident in the basis, coordinates[0], and the subset of them whose vertices no shape
+    key of the (keys, vertices, 3) coordinates moves
+    """
+    candidates = coincident_pairs(coordinates[0], distance)
+    return candidates, candidates[unmoved_vertices(coordinates)[candidates].all(axis=1)]
+
+def shape_key_safe_pairs(coordinates: npt.NDArray[np.float32], distance: float) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Pairs coincident in the basis, coordinates[0], and the subset of them that stays coincident
+    in every shape key of the (keys, vertices, 3) coordinates
+    """
+    candidates = coincident_pairs(coordinates[0], distance)
+    safe = candidates
+    for key_coordinates in coordinates[1:]:
+        if not len(safe):
+            break
+        safe = safe[pairs_within(key_coordinates, safe, distance)]
+    return candidates, safe
+
+def merge_targets(pairs: npt.NDArray[np.int64], coordinates: npt.NDArray[np.float32], distance: float) -> npt.NDArray[np.int64]:
+    """
+    Vertex each vertex merges into, itself when it stays. Connected pairs merge into their lowest
+    index, members that would move further than distance in any shape key are left alone
+    """
+    targets = np.arange(coordinates.shape[1], dtype=np.int64)
+    if not len(pairs):
+        return targets
+
+    # Propagate the lowest index through connected pairs until nothing changes
+    while True:
+        lowest = np.minimum(targets[pairs[:, 0]], targets[pairs[:, 1]])
+        updated = targets.copy()
+        np.minimum.at(updated, pairs[:, 0], lowest)
+        np.minimum.at(updated, pairs[:, 1], lowest)
+        updated = updated[updated]
+        if np.array_equal(updated, targets):
+            break
+        targets = updated
+
+    # A chain of close pairs can still span more than distance, check every member against its target
+    merging = np.flatnonzero(targets != np.arange(len(targets)))
+    for key_coordinates in coordinates:
+        if not len(merging):
+            break
+        delta = key_coordinates[merging].astype(np.float64) - key_coordinates[targets[merging]]
+        too_far = np.einsum('ij,ij->i', delta, delta) > distance * distance
+        targets[merging[too_far]] = merging[too_far]
+        merging = merging[~too_far]
+    return targets
+
+def merge_analysis(coordinates: npt.NDArray[np.float32], distance: float, shape_key_safe: bool = True) -> Dict[str, Any]:
+    """
+    What remove doubles would do to the (keys, vertices, 3) coordinates without changing anything.
+    With shape_key_safe a shape key blocks the pairs it pulls apart, otherwise it blocks every pair
+    with a vertex it moves. A pair can be blocked by several keys, so blocked_by_key may add up to
+    more than blocked
+    """
+    candidates = coincident_pairs(coordinates[0], distance)
+    blocked_by_key = np.zeros(len(coordinates) - 1, dtype=np.int64)
+    mergeable = np.ones(len(candidates), dtype=bool)
+
+    if len(candidates):
+        # Only the vertices of candidate pairs matter, which keeps the per key work small
+        members, local_pairs = np.unique(candidates, return_inverse=True)
+        local_pairs = local_pairs.reshape(candidates.shape)
+        basis = coordinates[0][members]
+        for index, key_coordinates in enumerate(coordinates[1:]):
+            key_members = key_coordinates[members]
+            if shape_key_safe:
+                blocks = ~pairs_within(key_members, local_pairs, distance)
+            else:
+                moved = (key_members != basis).any(axis=1)
+                blocks = moved[local_pairs].any(axis=1)
+            blocked_by_key[index] = np.count_nonzero(blocks)
+            mergeable &= ~blocks
+
+    # Without shape key safety only the basis decides where the merged vertices end up
+    targets = merge_targets(candidates[mergeable], coordinates if shape_key_safe else coordinates[:1], distance)
+    return {
+        "vertices": coordinates.shape[1],
+        "candidates": len(candidates),
+        "blocked": int(np.count_nonzero(~mergeable)),
+        "blocked_by_key": blocked_by_key,
+        "merged": int(np.count_nonzero(targets != np.arange(len(targets)))),
+    }
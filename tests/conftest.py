@@ -0,0 +1,23 @@
+import os
+import sys
+import importlib
+import importlib.util
+import pytest
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_PACKAGE = "avatar_toolkit"
+
+def load_addon_module(name: str):
+    """Import a module of the add-on from this checkout, whatever the checkout directory is called"""
+    if ADDON_PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(ADDON_PACKAGE, os.path.join(ADDON_DIR, "__init__.py"),
+                                                      submodule_search_locations=[ADDON_DIR])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[ADDON_PACKAGE] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(f"{ADDON_PACKAGE}.{name}")
+
+@pytest.fixture
+def addon_module():
+    """Loader for add-on modules by their dotted path inside the package, e.g. "core.importers.pmx_reader" """
+    return load_addon_module
@@ -0,0 +1,31 @@
+import pytest
+
+# Runs inside Blender or with the bpy module installed, e.g. pip install bpy
+bpy = pytest.importorskip("bpy")
+
+def new_object(name: str) -> bpy.types.Object:
+    obj = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+def test_rollback_removes_only_tracked_blocks(addon_module):
+    build_rollback = addon_module("core.importers.build_rollback")
+    physics_builder = addon_module("core.importers.physics_builder")
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    new_object("Before")
+    rollback = build_rollback.BuildRollback()
+    with rollback.track():
+        new_object("Step 1")
+        physics_builder.ensure_rigid_body_world(bpy.context.scene)
+    # Made by the user between two build steps
+    new_object("Between")
+    with rollback.track():
+        new_object("Step 2")
+        bpy.data.materials.new("Step 2")
+
+    assert rollback.remove() == 7
+    assert sorted(bpy.data.objects.keys()) == ["Before", "Between"]
+    assert sorted(bpy.data.meshes.keys()) == ["Before", "Between"]
+    assert not bpy.data.materials and not bpy.data.collections
+    assert bpy.context.scene.rigidbody_world is None
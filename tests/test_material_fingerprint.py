@@ -0,0 +1,25 @@
+import pytest
+
+# Runs inside Blender or with the bpy module installed, e.g. pip install bpy
+bpy = pytest.importorskip("bpy")
+
+def rgb_material(name: str, color) -> bpy.types.Material:
+    """A Principled BSDF material whose base color comes from an RGB node"""
+    material = bpy.data.materials.new(name)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    rgb = nodes.new('ShaderNodeRGB')
+    rgb.outputs[0].default_value = color
+    material.node_tree.links.new(rgb.outputs[0], nodes["Principled BSDF"].inputs["Base Color"])
+    return material
+
+def test_output_values_tell_materials_apart(addon_module):
+    materials_tools = addon_module("functions.optimization.materials_tools")
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+    red = rgb_material("Red", (1.0, 0.0, 0.0, 1.0))
+    blue = rgb_material("Blue", (0.0, 0.0, 1.0, 1.0))
+    other_red = rgb_material("Other Red", (1.0, 0.0, 0.0, 1.0))
+
+    assert not materials_tools.materials_match(red, blue)
+    assert materials_tools.materials_match(red, other_red)
@@ -0,0 +1,44 @@
+import pytest
+
+# Runs inside Blender or with the bpy module installed, e.g. pip install bpy
+bpy = pytest.importorskip("bpy")
+
+class FakeModel:
+    def __init__(self, name: str, fail: bool = False):
+        self.name = name
+        self.fail = fail
+
+def fake_build(model, path, texture_cache, progress=None):
+    """Create an object like a real build would, failing halfway when asked to"""
+    obj = bpy.data.objects.new(model.name, bpy.data.meshes.new(model.name))
+    bpy.context.scene.collection.objects.link(obj)
+    if model.fail:
+        raise ValueError("broken armature")
+    return obj
+
+def test_failures_are_raised_and_rolled_back(tmp_path, monkeypatch, addon_module):
+    importer = addon_module("core.importers.importer")
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    user_obj = bpy.data.objects.new("User", None)
+    bpy.context.scene.collection.objects.link(user_obj)
+
+    names = ["good.pmx", "corrupt.pmx", "half.pmx"]
+    for name in names:
+        (tmp_path / name).write_bytes(b"")
+    results = {
+        "good.pmx": (FakeModel("Good"), None),
+        "corrupt.pmx": (None, "Invalid PMX file"),
+        "half.pmx": (FakeModel("Half", fail=True), None),
+    }
+    monkeypatch.setattr(importer, "load_mmd_models",
+                        lambda paths: [(path, *results[path.rsplit("/", 1)[-1]]) for path in paths])
+    monkeypatch.setitem(importer.MMD_FORMATS, "pmx", (fake_build, None, None))
+
+    with pytest.raises(RuntimeError) as error:
+        importer.import_mmd_files(str(tmp_path), [{"name": name} for name in names], "")
+
+    assert "2 of 3" in str(error.value)
+    assert "corrupt.pmx: Invalid PMX file" in str(error.value)
+    assert "half.pmx: broken armature" in str(error.value)
+    assert sorted(bpy.data.objects.keys()) == ["Good", "User"]
+    assert sorted(bpy.data.meshes.keys()) == ["Good"]
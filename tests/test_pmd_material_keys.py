@@ -0,0 +1,47 @@
+import struct
+
+def fixed_text(text: str, size: int) -> bytes:
+    """A zero terminated Shift-JIS string padded to a fixed size"""
+    data = text.encode('shift-jis') + b'\0'
+    return data + b'\0' * (size - len(data))
+
+# (texture name, diffuse RGBA, specular strength, specular RGB)
+MATERIALS = [
+    ("body.png", (0.8, 0.7, 0.6, 1.0), 5.0, (0.1, 0.1, 0.1)),
+    ("body.png*sphere.spa", (0.8, 0.7, 0.6, 1.0), 5.0, (0.1, 0.1, 0.1)),
+    ("", (0.2, 0.3, 0.4, 0.5), 1.0, (0.0, 0.0, 0.0)),
+]
+
+def write_pmd(filepath: str) -> None:
+    """A PMD with one triangle per material and no bones, IK or morphs"""
+    data = bytearray(b'Pmd') + struct.pack('<f', 1.0) + fixed_text("model", 20) + fixed_text("", 256)
+    vertex_count = 3 * len(MATERIALS)
+    data += struct.pack('<I', vertex_count)
+    for index in range(vertex_count):
+        data += struct.pack('<8f2HBB', float(index), 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0, 0, 100, 0)
+    data += struct.pack('<I', vertex_count)
+    data += struct.pack(f'<{vertex_count}H', *range(vertex_count))
+    data += struct.pack('<I', len(MATERIALS))
+    for texture_name, diffuse, specular_strength, specular in MATERIALS:
+        data += struct.pack('<4ff3f3fBBI', *diffuse, specular_strength, *specular, 0.2, 0.2, 0.2, 0, 1, 3)
+        data += fixed_text(texture_name, 20)
+    data += struct.pack('<HHH', 0, 0, 0)
+    with open(filepath, 'wb') as file:
+        file.write(data)
+
+def test_material_keys_are_hashable_and_shared(tmp_path, addon_module):
+    pmd_reader = addon_module("core.importers.pmd_reader")
+    filepath = str(tmp_path / "materials.pmd")
+    write_pmd(filepath)
+
+    keys = pmd_reader.pmd_material_keys(pmd_reader.read_pmd(filepath))
+    assert len(keys) == len(MATERIALS)
+    # The sphere map suffix is dropped, so the first two materials share a slot
+    assert keys[0] == keys[1]
+    assert len(set(keys)) == 2
+
+    texture_name, diffuse, specular, specular_strength = keys[2]
+    assert texture_name == ""
+    assert diffuse == tuple(struct.unpack('<4f', struct.pack('<4f', *MATERIALS[2][1])))
+    assert specular == (0.0, 0.0, 0.0)
+    assert specular_strength == 1.0
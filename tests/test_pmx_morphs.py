@@ -0,0 +1,37 @@
+import logging
+import numpy as np
+
+def vertex_morph(pmx_reader, pmx_decoder, name, vertex, offset):
+    return pmx_reader.PMXMorph(name, name, 1, pmx_decoder.MORPH_VERTEX, np.array([vertex], dtype=np.int32),
+                               np.array([offset], dtype=np.float32))
+
+def group_morph(pmx_reader, pmx_decoder, name, children):
+    """A group morph from (morph index, weight) pairs"""
+    indices = np.array([index for index, _ in children], dtype=np.int32)
+    weights = np.array([[weight] for _, weight in children], dtype=np.float32)
+    return pmx_reader.PMXMorph(name, name, 1, pmx_decoder.MORPH_GROUP, indices, weights)
+
+def test_cyclic_group_references_are_dropped(addon_module, caplog):
+    pmx_reader = addon_module("core.importers.pmx_reader")
+    pmx_decoder = addon_module("core.importers.pmx_decoder")
+    pmx_morphs = addon_module("core.importers.pmx_morphs")
+
+    morphs = [
+        vertex_morph(pmx_reader, pmx_decoder, "Smile", 0, (2.0, 0.0, 0.0)),
+        # References itself and the vertex morph
+        group_morph(pmx_reader, pmx_decoder, "Self", [(1, 1.0), (0, 0.5)]),
+        # Two groups referencing each other, the second also drives the vertex morph
+        group_morph(pmx_reader, pmx_decoder, "Ping", [(3, 1.0)]),
+        group_morph(pmx_reader, pmx_decoder, "Pong", [(2, 1.0), (0, 1.0)]),
+        # Outside any cycle, reaches the vertex morph through the self-referencing group
+        group_morph(pmx_reader, pmx_decoder, "Outer", [(1, 2.0)]),
+    ]
+    with caplog.at_level(logging.WARNING):
+        flattened = pmx_morphs.flatten_group_morphs(morphs)
+
+    assert np.allclose(flattened[1][1], [[1.0, 0.0, 0.0]])
+    assert 2 not in flattened
+    assert np.allclose(flattened[3][1], [[2.0, 0.0, 0.0]])
+    assert np.allclose(flattened[4][1], [[2.0, 0.0, 0.0]])
+    assert "Ping, Pong, Self" in caplog.text
+    assert "deeper than" not in caplog.text
@@ -0,0 +1,92 @@
+import pytest
+
+# Runs inside Blender or with the bpy module installed, e.g. pip install bpy
+bpy = pytest.importorskip("bpy")
+
+# (name, parent, head, tail, use_deform)
+BONES = [
+    ("Root", None, (0.0, 0.0, 0.0), (0.0, 0.0, 0.5), True),
+    ("Arm", "Root", (0.0, 0.0, 0.5), (0.5, 0.0, 0.5), True),
+    ("Hand", "Arm", (0.6, 0.0, 0.5), (0.8, 0.0, 0.5), True),
+    ("Eye Control", "Root", (0.0, -0.2, 1.0), (0.0, -0.2, 1.1), False),
+]
+
+def build_test_scene():
+    """An armature with deforming and non-deforming bones and a triangle weighted to all of them"""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    collection = bpy.context.scene.collection
+
+    armature = bpy.data.armatures.new("Test_Armature")
+    armature_obj = bpy.data.objects.new("Test_Armature", armature)
+    collection.objects.link(armature_obj)
+    bpy.context.view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='EDIT')
+    for name, parent, head, tail, use_deform in BONES:
+        edit_bone = armature.edit_bones.new(name)
+        edit_bone.head = head
+        edit_bone.tail = tail
+        edit_bone.use_deform = use_deform
+        if parent is not None:
+            edit_bone.parent = armature.edit_bones[parent]
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    mesh = bpy.data.meshes.new("Test")
+    mesh.from_pydata([(0.0, 0.0, 0.0), (0.5, 0.0, 0.5), (0.8, 0.0, 0.5)], [], [(0, 1, 2)])
+    mesh_obj = bpy.data.objects.new("Test", mesh)
+    collection.objects.link(mesh_obj)
+    for name, index in (("Root", 0), ("Arm", 1), ("Hand", 2), ("Eye Control", 0)):
+        mesh_obj.vertex_groups.new(name=name).add([index], 1.0, 'REPLACE')
+    return armature_obj, mesh_obj
+
+def test_use_deform_survives_export_and_import(tmp_path, addon_module):
+    export_pmx = addon_module("core.exporters.export_pmx")
+    pmx_reader = addon_module("core.importers.pmx_reader")
+    import_pmx = addon_module("core.importers.import_pmx")
+    texture_cache = addon_module("core.importers.texture_cache")
+
+    armature_obj, mesh_obj = build_test_scene()
+    filepath = str(tmp_path / "round_trip.pmx")
+    export_pmx.export_pmx(filepath, armature_obj, [mesh_obj])
+
+    model = pmx_reader.read_pmx(filepath)
+    # Rotatable, translatable, visible and operable, none of the bones are connected or locked
+    assert all(bone.flag & 0x001E == 0x001E for bone in model.bones)
+
+    imported = import_pmx.build_pmx(model, filepath, texture_cache.TextureCache())
+    for name, _, _, _, use_deform in BONES:
+        assert imported.data.bones[name].use_deform == use_deform
+
+def test_rigid_bodies_follow_the_import_transform(tmp_path, addon_module):
+    export_pmx = addon_module("core.exporters.export_pmx")
+    pmx_reader = addon_module("core.importers.pmx_reader")
+    import_pmx = addon_module("core.importers.import_pmx")
+    texture_cache = addon_module("core.importers.texture_cache")
+    from mathutils import Matrix, Vector
+
+    armature_obj, mesh_obj = build_test_scene()
+    filepath = str(tmp_path / "physics.pmx")
+    export_pmx.export_pmx(filepath, armature_obj, [mesh_obj])
+
+    model = pmx_reader.read_pmx(filepath)
+    arm_index = [bone.name for bone in model.bones].index("Arm")
+    # A bone-following body and a simulated one at the same PMX position, joined by a joint
+    for name, mode in (("Follow", 0), ("Simulated", 1)):
+        model.rigid_bodies.append(pmx_reader.PMXRigidBody(name, arm_index, 0, 0, (0.5, 0.5, 0.5), (0.0, 1.0, 0.0),
+                                                          (0.0, 0.0, 0.0), 1.0, 0.5, 0.5, 0.0, 0.5, mode))
+    model.joints.append(pmx_reader.PMXJoint("Joint", 0, 0, 1, (0.0, 1.0, 0.0), (0.0, 0.0, 0.0),
+                                            (-1.0, -2.0, -3.0), (1.0, 2.0, 3.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0),
+                                            (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)))
+
+    imported = import_pmx.build_pmx(model, filepath, texture_cache.TextureCache())
+    bpy.context.view_layer.update()
+
+    expected = Matrix.Rotation(1.5708, 4, 'X') @ Vector((0.0, 1.0, 0.0)) * import_pmx.IMPORT_SCALE
+    follow = bpy.data.objects["RB_Follow"]
+    simulated = bpy.data.objects["RB_Simulated"]
+    assert follow.parent == imported and follow.parent_type == 'BONE' and follow.parent_bone == "Arm"
+    assert (follow.matrix_world.translation - expected).length < 1e-4
+    assert (simulated.matrix_world.translation - expected).length < 1e-4
+
+    constraint = bpy.data.objects["Joint_Joint"].rigid_body_constraint
+    assert abs(constraint.limit_lin_y_lower - -2.0 * import_pmx.IMPORT_SCALE) < 1e-6
+    assert abs(constraint.limit_lin_z_upper - 3.0 * import_pmx.IMPORT_SCALE) < 1e-6
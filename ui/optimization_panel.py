@@ -38,6 +38,7 @@ class AvatarToolKit_PT_OptimizationPanel(Panel):
         row: UILayout = col.row(align=True)
         row.operator("avatar_toolkit.remove_doubles", icon='MESH_DATA')
         row.operator("avatar_toolkit.remove_doubles_advanced", icon='PREFERENCES')
+        row.operator("avatar_toolkit.remove_doubles_analyze", icon='VIEWZOOM')
         
         # Join Meshes Box
         join_box: UILayout = layout.box()
@@ -54,6 +54,7 @@ class AvatarToolKit_MT_ExportMenu(Menu):
         layout: UILayout = self.layout
         layout.operator("avatar_toolkit.export_fbx", text=t("QuickAccess.export_fbx"))
         layout.operator("avatar_toolkit.export_resonite", text=t("QuickAccess.export_resonite"))
+        layout.operator("avatar_toolkit.export_pmx", text=t("QuickAccess.export_pmx"))
 
 class AvatarToolKit_OT_ExportMenu(Operator):
     """Open the export menu"""
@@ -153,5 +154,6 @@ class AvatarToolKit_PT_QuickAccessPanel(Panel):
         button_row.scale_y = 1.5
         button_row.operator("avatar_toolkit.import", text=t("QuickAccess.import"), icon='IMPORT')
         button_row.operator("avatar_toolkit.export", text=t("QuickAccess.export"), icon='EXPORT')
+        col.operator("avatar_toolkit.import_pmx_modal", text=t("QuickAccess.import_pmx"), icon='IMPORT')
 
 
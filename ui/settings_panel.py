@@ -61,6 +61,18 @@ class AvatarToolKit_PT_SettingsPanel(Panel):
         col.separator()
         col.prop(context.scene.avatar_toolkit, "validation_mode", text="")
 
+        # Import Settings
+        cache_box: UILayout = layout.box()
+        col = cache_box.column(align=True)
+        row = col.row()
+        row.scale_y = 1.2
+        row.label(text=t("Settings.parse_cache"), icon='FILE_CACHE')
+        col.separator()
+        col.prop(context.scene.avatar_toolkit, "enable_parse_cache")
+        col.operator("avatar_toolkit.clear_parse_cache", icon='TRASH')
+        col.separator()
+        col.prop(context.scene.avatar_toolkit, "import_shape_key_tolerance")
+
         # Debug Settings
         debug_box = layout.box()
         col = debug_box.column()
@@ -74,3 +86,10 @@ class AvatarToolKit_PT_SettingsPanel(Panel):
         if context.scene.avatar_toolkit.debug_expand:
             col = debug_box.column(align=True)
             col.prop(context.scene.avatar_toolkit, "enable_logging")
+            col.prop(context.scene.avatar_toolkit, "enable_import_profiling")
+            row = col.row()
+            row.enabled = context.scene.avatar_toolkit.enable_import_profiling
+            row.prop(context.scene.avatar_toolkit, "import_profiling_trace_memory")
+            row = col.row()
+            row.enabled = context.scene.avatar_toolkit.enable_import_profiling
+            row.prop(context.scene.avatar_toolkit, "import_profiling_json_report")